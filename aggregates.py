@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""일정 통계 - 날짜별로 가족마다 차지한 칸 수와 겹친 칸 수를 들고 있다가, 일정이 바뀔 때 그 일정 몫만 더하고 뺀다.
+
+겹친 칸(overlaps): 그날 일정 2개 이상이 같은 칸에 있는 칸의 수. 날짜·칸마다 일정 수를 세어 두므로
+일정 하나를 넣고 빼는 비용은 그 일정의 칸 수에만 비례한다. 스레드 안전하지 않으므로 부르는 쪽이 잠근다.
+"""
+from datetime import date, timedelta
+
+
+class DailyStats:
+    """{날짜: {가족: 칸 수}}, {날짜: {칸: 일정 수}}, {날짜: 겹친 칸 수}."""
+
+    def __init__(self, row_limit):
+        self.row_limit = row_limit   # 이 칸 번호부터는 세지 않는다 (화면에 없는 칸)
+        self.members = {}
+        self.rows = {}
+        self.overlaps = {}
+
+    @classmethod
+    def from_events(cls, events, row_limit):
+        """처음부터 다시 센다. 들고 있던 값과 비교해 검증할 때도 쓴다."""
+        stats = cls(row_limit)
+        for ev in events:
+            stats.add(ev)
+        return stats
+
+    def _rows_of(self, ev):
+        return range(ev["start_row"], min(ev["end_row"], self.row_limit))
+
+    def add(self, ev, sign=1):
+        rows = self._rows_of(ev)
+        if not rows:
+            return
+        day = ev["date"]
+        members = self.members.setdefault(day, {})
+        members[ev["who"]] = members.get(ev["who"], 0) + sign * len(rows)
+        if not members[ev["who"]]:
+            del members[ev["who"]]
+        counts = self.rows.setdefault(day, {})
+        overlaps = self.overlaps.get(day, 0)
+        for r in rows:
+            before = counts.get(r, 0)
+            after = before + sign
+            # 1 → 2 이면 겹친 칸이 하나 생기고, 2 → 1 이면 하나 없어진다
+            if before < 2 <= after:
+                overlaps += 1
+            elif after < 2 <= before:
+                overlaps -= 1
+            if after:
+                counts[r] = after
+            else:
+                del counts[r]
+        self.overlaps[day] = overlaps
+        for table in (self.members, self.rows, self.overlaps):
+            if not table[day]:
+                del table[day]
+
+    def remove(self, ev):
+        self.add(ev, sign=-1)
+
+    def snapshot(self):
+        """비교용 (가족별, 겹침) 사본."""
+        return ({d: dict(m) for d, m in self.members.items()}, dict(self.overlaps))
+
+    def day(self, day_str, extra=()):
+        """(가족별 칸 수, 겹친 칸 수). extra 는 저장되지 않은 일정(펼친 반복 일정)으로, 그날 값에 얹어서 센다."""
+        members = dict(self.members.get(day_str, {}))
+        overlaps = self.overlaps.get(day_str, 0)
+        if extra:
+            counts = dict(self.rows.get(day_str, {}))
+            for ev in extra:
+                rows = self._rows_of(ev)
+                members[ev["who"]] = members.get(ev["who"], 0) + len(rows)
+                for r in rows:
+                    counts[r] = counts.get(r, 0) + 1
+            overlaps = sum(1 for n in counts.values() if n >= 2)
+        return members, overlaps
+
+
+def group_key(day_str, group):
+    """day → 그날, week → 그 주 월요일, month → "YYYY-MM", member → 기간 전체 하나."""
+    if group == "day":
+        return day_str
+    if group == "week":
+        d = date.fromisoformat(day_str)
+        return (d - timedelta(days=d.weekday())).isoformat()
+    if group == "month":
+        return day_str[:7]
+    return "all"
+
+
+def summarize(stats, dates, group, slot_minutes, extra_by_date=None):
+    """dates(날짜 문자열 목록)의 값을 group(member|day|week|month) 으로 묶는다.
+    → [{"key", "from", "to", "slots", "hours", "overlaps", "members": {가족: {"slots", "hours", "days"}}}]"""
+    extra_by_date = extra_by_date or {}
+    out = []
+    current = None
+    for day_str in dates:
+        key = group_key(day_str, group)
+        if current is None or current["key"] != key:
+            current = {"key": key, "from": day_str, "to": day_str, "slots": 0, "overlaps": 0, "members": {}}
+            out.append(current)
+        current["to"] = day_str
+        members, overlaps = stats.day(day_str, extra_by_date.get(day_str, ()))
+        current["overlaps"] += overlaps
+        for who, n in members.items():
+            m = current["members"].setdefault(who, {"slots": 0, "days": 0})
+            m["slots"] += n
+            m["days"] += 1
+            current["slots"] += n
+    for row in out:
+        row["hours"] = row["slots"] * slot_minutes / 60
+        for m in row["members"].values():
+            m["hours"] = m["slots"] * slot_minutes / 60
+    return out
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""API 벤치마크 / 부하 테스트 - 합성 달력을 만들어 /api/data, /api/event, /api/event/update, /api/event/delete 를 잰다.
+
+    python bench/bench_api.py --events 1000,100000 --backends json,sqlite --drivers client --out bench.json
+    python bench/bench_api.py --events 10000 --backends postgres --database-url postgresql://.../bench --reset-db
+    python bench/bench_api.py --drivers gunicorn --concurrency 8      # gunicorn 이 설치돼 있어야 함
+
+시나리오마다 앱 파일만 임시 폴더에 복사해서 돌리므로 실제 family_events.json / DB 는 건드리지 않는다
+(postgres 는 예외: 빈 벤치 전용 DB 를 주거나 --reset-db 로 비운다).
+결과는 시나리오 x 엔드포인트마다 p50/p95/p99(ms), 처리량(req/s), 최대 RSS(KB) 를 담은 JSON.
+
+드라이버
+  client   : 한 프로세스 안에서 Flask test client 로 순서대로 요청 (네트워크/워커 비용 없이 앱 코드만)
+  gunicorn : 임시 폴더에서 gunicorn(gthread)을 띄우고 --concurrency 개의 스레드가 HTTP keep-alive 로 요청
+"""
+import argparse
+import glob
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("data", "add", "update", "delete")
+MEMBERS = ("아빠", "엄마", "수현", "태현")
+SLOTS = 36  # 기본 시간표(06:00~24:00, 30분)의 칸 수. 마지막 칸(24:00)은 끝 시각으로만 쓴다
+
+
+# ----- 합성 달력 -----
+def synth_events(n, overlap, duration, seed):
+    """n 개의 일정. 한 칸을 평균 overlap 개의 일정이 덮도록 하루 일정 수를 정하고, 길이는 1~duration 칸."""
+    rnd = random.Random(seed)
+    avg_len = (1 + duration) / 2.0
+    per_day = max(1, int(round(overlap * SLOTS / avg_len)))
+    start_day = date(2026, 1, 5)
+    events = {}
+    for i in range(n):
+        d = (start_day + timedelta(days=i // per_day)).isoformat()
+        length = rnd.randint(1, duration)
+        s = rnd.randint(0, SLOTS - length)
+        who = rnd.choice(MEMBERS)
+        eid = "b%08d" % i
+        events[eid] = {"event_id": eid, "date": d, "start_row": s, "end_row": s + length, "who": who,
+                       "text": "%s: bench %d" % (who, i), "bg": "#BBDEFB", "memo": None}
+    days = (n + per_day - 1) // per_day
+    return events, start_day.isoformat(), days
+
+
+def prepare_dir(args, backend, n):
+    """앱 파일을 복사한 임시 폴더와 그 폴더에서 쓸 환경 변수를 만든다."""
+    work = tempfile.mkdtemp(prefix="bench_%s_%d_" % (backend, n))
+    for path in glob.glob(os.path.join(REPO_DIR, "*.py")):
+        if os.path.basename(path) != "family.py":
+            shutil.copy(path, work)
+    shutil.copytree(os.path.join(REPO_DIR, "templates"), os.path.join(work, "templates"))
+    env = dict(os.environ, PYTHONPATH=work, PYTHONHASHSEED="0")
+    env.pop("DATABASE_URL", None)
+    env["CALENDAR_STORAGE"] = {"json": "json", "log": "log", "sqlite": "sqlite"}.get(backend, "json")
+    if backend == "postgres":
+        env["DATABASE_URL"] = args.database_url
+    events, first_day, days = synth_events(n, args.overlap, args.duration, args.seed)
+    meta = {"first_day": first_day, "days": days, "ids": sorted(random.Random(args.seed).sample(
+        sorted(events), min(len(events), 2 * args.requests)))}
+    with open(os.path.join(work, "bench_meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    doc = {"format": 2, "version": 0, "events": events, "series": {}, "journal": []}
+    target = "family_events.json" if backend in ("json", "log") else "bench_events.json"
+    with open(os.path.join(work, target), "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+    if backend in ("sqlite", "postgres"):
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker", "import"] + (["--reset-db"] if args.reset_db else [])
+        subprocess.run(cmd, cwd=work, env=env, check=True)
+    return work, env
+
+
+# ----- 측정 -----
+def summarize(latencies, wall):
+    lat = sorted(latencies)
+    if not lat:
+        return {"n": 0}
+
+    def pct(p):
+        return round(lat[min(len(lat) - 1, int(p / 100.0 * len(lat)))] * 1000, 3)
+
+    return {"n": len(lat), "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99),
+            "max_ms": round(lat[-1] * 1000, 3), "throughput_rps": round(len(lat) / wall, 1) if wall else None}
+
+
+def request_plan(meta, endpoint, n, seed):
+    """엔드포인트별 (method, path, body) n 개. update 는 앞쪽 id, delete 는 뒤쪽 id 를 써서 서로 겹치지 않는다."""
+    rnd = random.Random(seed)
+    first = date.fromisoformat(meta["first_day"])
+    ids = meta["ids"]
+    half = len(ids) // 2
+    plan = []
+    for i in range(n):
+        if endpoint == "data":
+            start = first + timedelta(days=rnd.randrange(max(1, meta["days"])))
+            start -= timedelta(days=start.weekday())
+            path = "/api/data?from=%s&to=%s" % (start.isoformat(), (start + timedelta(days=6)).isoformat())
+            plan.append(("GET", path, None))
+        elif endpoint == "add":
+            d = first + timedelta(days=rnd.randrange(max(1, meta["days"])))
+            plan.append(("POST", "/api/event", {"date_str": d.isoformat(), "time_index": rnd.randrange(SLOTS - 2),
+                                                "end_time": "", "who": rnd.choice(MEMBERS), "content": "added %d" % i}))
+        elif endpoint == "update":
+            plan.append(("POST", "/api/event/update", {"event_id": ids[i % max(1, half)], "content": "updated %d" % i,
+                                                       "who": rnd.choice(MEMBERS)}))
+        else:
+            plan.append(("POST", "/api/event/delete", {"event_id": ids[half + i % max(1, len(ids) - half)]}))
+    return plan
+
+
+def peak_rss_kb(pids=None):
+    """pids(기본: 자기 자신)의 VmHWM 합 (리눅스). 없으면 getrusage 값."""
+    total = 0
+    for pid in pids or ["self"]:
+        try:
+            with open("/proc/%s/status" % pid) as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+        except (OSError, StopIteration):
+            if pid == "self":
+                import resource
+                return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return total
+
+
+def worker_client(args):
+    """임시 폴더 안에서: Flask test client 로 엔드포인트마다 --requests 번 순서대로 요청."""
+    t0 = time.perf_counter()
+    import family_app
+    startup = time.perf_counter() - t0
+    with open("bench_meta.json", encoding="utf-8") as f:
+        meta = json.load(f)
+    client = family_app.app.test_client()
+    out = {"startup_s": round(startup, 3), "endpoints": {}}
+    for endpoint in args.endpoints:
+        plan = request_plan(meta, endpoint, args.requests, args.seed)
+        latencies = []
+        wall0 = time.perf_counter()
+        for method, path, body in plan:
+            t = time.perf_counter()
+            resp = client.open(path, method=method, json=body)
+            resp.get_data()
+            latencies.append(time.perf_counter() - t)
+            if resp.status_code >= 400:
+                raise SystemExit("%s %s → %d %s" % (method, path, resp.status_code, resp.get_data(as_text=True)[:200]))
+        out["endpoints"][endpoint] = summarize(latencies, time.perf_counter() - wall0)
+    out["peak_rss_kb"] = peak_rss_kb()
+    print(json.dumps(out))
+
+
+def worker_import(args):
+    import family_app
+    if family_app.db_engine is None:
+        raise SystemExit("DB not available")
+    session = family_app.Session()
+    try:
+        existing = session.query(family_app.CalendarEvent).count()
+        if existing and not args.reset_db:
+            raise SystemExit("database already has %d events; use an empty bench database or --reset-db" % existing)
+        if args.reset_db:
+            for model in (family_app.CalendarEvent, family_app.CalendarSeries, family_app.CalendarChange):
+                session.query(model).delete()
+            session.commit()
+    finally:
+        session.close()
+    family_app.import_json_file("bench_events.json")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def child_pids(pid):
+    pids = [pid]
+    for stat in glob.glob("/proc/[0-9]*/stat"):
+        try:
+            with open(stat) as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            if int(fields[1]) == pid:
+                pids.append(int(stat.split("/")[2]))
+        except (OSError, IndexError, ValueError):
+            continue
+    return pids
+
+
+def run_gunicorn(args, work, env):
+    """임시 폴더에서 gunicorn 을 띄우고 여러 스레드로 HTTP 요청을 보낸다."""
+    port = free_port()
+    cmd = ["gunicorn", "--worker-class", "gthread", "--threads", str(args.threads), "-w", str(args.workers),
+           "-b", "127.0.0.1:%d" % port, "--log-level", "warning", "family_app:app"]
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=work, env=env)
+    try:
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                if proc.poll() is not None or time.perf_counter() - t0 > 120:
+                    return {"error": "gunicorn did not start"}
+                time.sleep(0.1)
+        out = {"startup_s": round(time.perf_counter() - t0, 3), "endpoints": {}}
+        with open(os.path.join(work, "bench_meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        for endpoint in args.endpoints:
+            plan = request_plan(meta, endpoint, args.requests, args.seed)
+            latencies, errors = [], []
+            lock = threading.Lock()
+            queue = iter(plan)
+
+            def run():
+                conn = http.client.HTTPConnection("127.0.0.1", port)
+                while True:
+                    with lock:
+                        item = next(queue, None)
+                    if item is None:
+                        break
+                    method, path, body = item
+                    data = json.dumps(body).encode("utf-8") if body is not None else None
+                    t = time.perf_counter()
+                    conn.request(method, path, body=data, headers={"Content-Type": "application/json"})
+                    resp = conn.getresponse()
+                    resp.read()
+                    elapsed = time.perf_counter() - t
+                    with lock:
+                        latencies.append(elapsed)
+                        if resp.status >= 400:
+                            errors.append(resp.status)
+                conn.close()
+
+            wall0 = time.perf_counter()
+            threads = [threading.Thread(target=run) for _ in range(args.concurrency)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            out["endpoints"][endpoint] = dict(summarize(latencies, time.perf_counter() - wall0), errors=len(errors))
+        out["peak_rss_kb"] = peak_rss_kb(child_pids(proc.pid))
+        return out
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def run_scenario(args, backend, n, driver):
+    if driver == "gunicorn" and shutil.which("gunicorn") is None:
+        return {"skipped": "gunicorn not installed"}
+    work, env = prepare_dir(args, backend, n)
+    try:
+        if driver == "gunicorn":
+            return run_gunicorn(args, work, env)
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker", "client", "--requests", str(args.requests),
+               "--seed", str(args.seed), "--endpoints", ",".join(args.endpoints)]
+        res = subprocess.run(cmd, cwd=work, env=env, check=True, stdout=subprocess.PIPE, text=True)
+        return json.loads(res.stdout.strip().splitlines()[-1])
+    finally:
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    p.add_argument("--events", default="1000,10000", help="쉼표로 구분한 일정 수 (예: 1000,100000,1000000)")
+    p.add_argument("--backends", default="json,sqlite", help="json, log, sqlite, postgres")
+    p.add_argument("--drivers", default="client", help="client, gunicorn")
+    p.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    p.add_argument("--requests", type=int, default=200, help="엔드포인트마다 보낼 요청 수")
+    p.add_argument("--overlap", type=float, default=1.5, help="한 칸을 덮는 평균 일정 수")
+    p.add_argument("--duration", type=int, default=4, help="일정 길이 최대 칸 수 (1~이 값)")
+    p.add_argument("--concurrency", type=int, default=8, help="gunicorn 드라이버의 동시 요청 스레드 수")
+    p.add_argument("--workers", type=int, default=2, help="gunicorn 워커 수")
+    p.add_argument("--threads", type=int, default=8, help="gunicorn 워커당 스레드 수")
+    p.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL"), help="postgres 백엔드용 (벤치 전용 DB)")
+    p.add_argument("--reset-db", action="store_true", help="postgres: 시작 전에 일정 테이블을 비운다")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--keep", action="store_true", help="임시 폴더를 지우지 않는다")
+    p.add_argument("--out", help="결과 JSON 파일 (없으면 stdout)")
+    p.add_argument("--worker", choices=("client", "import"), help=argparse.SUPPRESS)
+    args = p.parse_args()
+    args.endpoints = [e for e in args.endpoints.split(",") if e]
+
+    if args.worker == "client":
+        return worker_client(args)
+    if args.worker == "import":
+        return worker_import(args)
+
+    results = []
+    for backend in args.backends.split(","):
+        if backend == "postgres" and not args.database_url:
+            print("skip postgres: --database-url not given", file=sys.stderr)
+            continue
+        for n in (int(x) for x in args.events.split(",")):
+            for driver in args.drivers.split(","):
+                print("== %s %d events, %s" % (backend, n, driver), file=sys.stderr)
+                res = run_scenario(args, backend, n, driver)
+                for endpoint, stats in res.get("endpoints", {}).items():
+                    results.append(dict(backend=backend, events=n, driver=driver, endpoint=endpoint,
+                                        startup_s=res.get("startup_s"), peak_rss_kb=res.get("peak_rss_kb"), **stats))
+                    print("   %-7s p50 %7.2f  p95 %7.2f  p99 %7.2f ms  %8.1f req/s" % (
+                        endpoint, stats["p50_ms"], stats["p95_ms"], stats["p99_ms"], stats["throughput_rps"]),
+                        file=sys.stderr)
+                if "endpoints" not in res:
+                    results.append(dict(backend=backend, events=n, driver=driver, **res))
+                    print("   %s" % res, file=sys.stderr)
+    report = {
+        "meta": {"python": sys.version.split()[0], "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "requests": args.requests, "overlap": args.overlap, "duration": args.duration, "seed": args.seed},
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""시간 입력 해석 마이크로 벤치마크: 예전 parse_start_row/parse_end_row(TIMES 선형 탐색) vs timegrid.TimeGrid.
+
+    python bench/bench_timegrid.py [반복 횟수]
+
+예전 파서가 알아듣던 입력에서는 두 결과가 같은지도 확인한다.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import timegrid  # noqa: E402
+
+GRID = timegrid.TimeGrid()
+TIMES = list(GRID.times)
+
+
+# ----- 예전 구현 (family_app.py 에서 그대로 옮김) -----
+def old_parse_start_row(start_str):
+    if not start_str or not str(start_str).strip():
+        return 0
+    s = str(start_str).strip()
+    for i, t in enumerate(TIMES):
+        if s == t or (len(s) <= 2 and t.startswith(s.zfill(2))):
+            return i
+    try:
+        n = int(s)
+        if 6 <= n <= 24:
+            for i, t in enumerate(TIMES):
+                if t == f"{n:02d}:00":
+                    return i
+            return min((n - 6) * 2, len(TIMES) - 1)
+    except ValueError:
+        pass
+    return 0
+
+
+def old_parse_end_row(end_str, start_row):
+    if not end_str or not str(end_str).strip():
+        return start_row + 1
+    end_str = str(end_str).strip()
+    for i, t in enumerate(TIMES):
+        if end_str == t or (len(end_str) <= 2 and t.startswith(end_str.zfill(2))):
+            if i <= start_row:
+                return start_row + 1
+            return i
+    try:
+        h = int(end_str)
+        if 6 <= h <= 24:
+            for i, t in enumerate(TIMES):
+                if t == f"{h:02d}:00":
+                    if i <= start_row:
+                        return start_row + 1
+                    return i
+            idx = (h - 6) * 2
+            if idx <= start_row:
+                return start_row + 1
+            return min(idx, len(TIMES))
+    except ValueError:
+        pass
+    return start_row + 1
+
+
+# 화면이 보내는 값("HH:MM")이 대부분이고, 손으로 친 값과 잘못된 값이 조금 섞인다
+INPUTS = ["06:00", "09:30", "13:00", "18:30", "23:30", "24:00", "9", "21", "", "abc"]
+NEW_FORMATS = ["9:15", "0930", "21시", "9시 30분", "7시반"]
+
+
+def check():
+    for s in INPUTS:
+        assert old_parse_start_row(s) == GRID.start_row(s), s
+        for start in (0, 10, 30):
+            assert old_parse_end_row(s, start) == GRID.end_row(s, start), (s, start)
+    for s in NEW_FORMATS:
+        print("  %-10s → start %-2d end %d" % (s, GRID.start_row(s), GRID.end_row(s, 0)))
+
+
+def bench(number):
+    def old():
+        for s in INPUTS:
+            old_parse_end_row(s, old_parse_start_row(s))
+
+    def new():
+        for s in INPUTS:
+            GRID.end_row(s, GRID.start_row(s))
+
+    results = {}
+    for name, fn in (("old (TIMES scan)", old), ("timegrid", new)):
+        best = min(timeit.repeat(fn, number=number, repeat=5))
+        results[name] = best / (number * len(INPUTS)) * 1e9
+    return results
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print("new formats:")
+    check()
+    res = bench(n)
+    print("start+end per input (best of 5, %d x %d inputs):" % (n, len(INPUTS)))
+    for name, ns in res.items():
+        print("  %-18s %8.0f ns" % (name, ns))
+    print("  speedup            %8.1fx" % (res["old (TIMES scan)"] / res["timegrid"]))
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""iCalendar(.ics, RFC 5545) 읽기/쓰기 - 휴대폰 달력과 주고받기용. 필요한 만큼만 구현했다.
+
+쓰기는 VEVENT 하나를 문자열 하나로 만들어 주므로 부르는 쪽이 제너레이터로 흘려보내면 되고,
+읽기는 줄 단위로 받아 VEVENT 하나가 끝날 때마다 내놓으므로 파일 전체를 메모리에 올리지 않는다.
+시각은 시간대 없는(floating) 달력 시간대 시각으로 쓰고 X-WR-TIMEZONE 으로 그 시간대를 알린다.
+읽을 때는 UTC(...Z) 와 TZID 가 붙은 시각을 달력 시간대(부르는 쪽이 주는 ZoneInfo)로 바꾸고,
+시간대 없는 시각은 이미 달력 시간대라고 본다. 서버가 어느 시간대에서 돌든 결과는 같다.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+PRODID = "-//family-calendar//KO"
+UID_DOMAIN = "family-calendar"
+WEEKDAY_CODES = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+
+# ----- 쓰기 -----
+def escape(text):
+    return (text or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+
+
+def fold(line):
+    """한 줄이 75 바이트를 넘으면 CRLF + 공백으로 접는다. UTF-8 글자 중간에서는 자르지 않는다."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts = []
+    start = 0
+    limit = 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start = end
+        limit = 74   # 이어지는 줄은 앞의 공백 1바이트
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_dt(dt):
+    return dt.strftime("%Y%m%dT%H%M%S")
+
+
+def header(name="가족 일정", tz_name=None):
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:" + PRODID, "CALSCALE:GREGORIAN", "X-WR-CALNAME:" + escape(name)]
+    if tz_name:
+        lines.append("X-WR-TIMEZONE:" + tz_name)
+    return "".join(fold(x) for x in lines)
+
+
+FOOTER = "END:VCALENDAR\r\n"
+
+
+def vevent(uid, start, end, summary, description=None, categories=None, stamp=None,
+           rrule=None, exdates=(), recurrence_id=None):
+    """VEVENT 하나를 접은 줄 문자열로. start/end/exdates/recurrence_id 는 datetime(현지 시각).
+    반복 규칙은 rrule('FREQ=WEEKLY;...') 과 빠진 날 exdates, 그중 하루만 고친 것은 같은 uid 에 recurrence_id."""
+    lines = ["BEGIN:VEVENT", "UID:" + uid,
+             "DTSTAMP:" + (stamp or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")]
+    if recurrence_id:
+        lines.append("RECURRENCE-ID:" + format_dt(recurrence_id))
+    lines += ["DTSTART:" + format_dt(start), "DTEND:" + format_dt(end), "SUMMARY:" + escape(summary)]
+    if rrule:
+        lines.append("RRULE:" + rrule)
+    if exdates:
+        lines.append("EXDATE:" + ",".join(format_dt(d) for d in exdates))
+    if description:
+        lines.append("DESCRIPTION:" + escape(description))
+    if categories:
+        lines.append("CATEGORIES:" + escape(categories))
+    lines.append("END:VEVENT")
+    return "".join(fold(x) for x in lines)
+
+
+# ----- 읽기 -----
+def unescape(text):
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), text)
+
+
+def unfold(lines):
+    """파일 줄(bytes 또는 str) → 접힌 줄을 이은 논리 줄."""
+    current = None
+    for raw in lines:
+        line = raw.decode("utf-8", "replace") if isinstance(raw, bytes) else raw
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line.lstrip("\ufeff") if current is None else line
+    if current:
+        yield current
+
+
+def split_property(line):
+    """'DTSTART;TZID=Asia/Seoul:20260302T090000' → ("DTSTART", {"TZID": "Asia/Seoul"}, "20260302T090000")."""
+    m = re.match(r'^([A-Za-z0-9-]+)((?:;[^:;]+=(?:"[^"]*"|[^:;]*))*):(.*)$', line)
+    if not m:
+        return None, {}, ""
+    params = {}
+    for p in re.findall(r';([^=;]+)=("[^"]*"|[^;]*)', m.group(2)):
+        params[p[0].upper()] = p[1].strip('"')
+    return m.group(1).upper(), params, m.group(3)
+
+
+def zone(name):
+    """IANA 시간대 이름(Asia/Seoul) → ZoneInfo. 모르는 이름(Windows 식 'Korea Standard Time' 등)이면 None."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def parse_value(value, params=None, tz=None):
+    """DATE/DATE-TIME 값 → date 또는 datetime(tz 의 시간대 없는 시각). 알아볼 수 없으면 None.
+    ...Z 는 UTC, TZID 가 있으면 그 시간대로 읽어 tz 로 바꾼다. tz 가 없으면 UTC 로 바꾼다.
+    시간대 없는 시각과 모르는 TZID 는 그대로 둔다."""
+    value = value.strip()
+    params = params or {}
+    try:
+        if params.get("VALUE") == "DATE" or len(value) == 8:
+            return datetime.strptime(value[:8], "%Y%m%d").date()
+        dt = datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+    except ValueError:
+        return None
+    source = timezone.utc if value.endswith("Z") else zone(params["TZID"]) if params.get("TZID") else None
+    if source is None:
+        return dt
+    return dt.replace(tzinfo=source).astimezone(tz or timezone.utc).replace(tzinfo=None)
+
+
+def read_events(lines, tz=None):
+    """줄 iterable → VEVENT 마다 {"UID", "SUMMARY", "DESCRIPTION", "CATEGORIES", "DTSTART", "DTEND", "DURATION",
+    "RRULE", "RECURRENCE-ID", "EXDATE": [...]} (없는 키는 빠짐). 날짜 값은 parse_value(..., tz) 로 바꿔 둔다."""
+    ev = None
+    for line in unfold(lines):
+        name, params, value = split_property(line)
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            ev = {"EXDATE": []}
+        elif name == "END" and value.upper() == "VEVENT" and ev is not None:
+            yield ev
+            ev = None
+        elif ev is None or name is None:
+            continue
+        elif name in ("DTSTART", "DTEND", "RECURRENCE-ID"):
+            ev[name] = parse_value(value, params, tz)
+        elif name == "EXDATE":
+            ev["EXDATE"].extend(d for d in (parse_value(v, params, tz) for v in value.split(",")) if d is not None)
+        elif name in ("SUMMARY", "DESCRIPTION", "CATEGORIES"):
+            ev[name] = unescape(value)
+        elif name in ("UID", "RRULE", "DURATION"):
+            ev[name] = value.strip()
+
+
+def parse_rrule(value):
+    """'FREQ=WEEKLY;BYDAY=MO,WE;INTERVAL=2;UNTIL=20260331' → {"FREQ": "WEEKLY", "BYDAY": ["MO", "WE"], ...}."""
+    rule = {}
+    for part in value.split(";"):
+        k, _, v = part.partition("=")
+        rule[k.upper()] = v.split(",") if k.upper() == "BYDAY" else v
+    return rule
+
+
+def parse_duration(value):
+    """'PT1H30M', 'P1D' → timedelta. 알아볼 수 없으면 None."""
+    m = re.match(r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$", value or "")
+    if not m:
+        return None
+    w, d, h, mi, s = (int(x or 0) for x in m.groups()[1:])
+    delta = timedelta(weeks=w, days=d, hours=h, minutes=mi, seconds=s)
+    return -delta if m.group(1) == "-" else delta
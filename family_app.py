@@ -1,20 +1,91 @@
 # -*- coding: utf-8 -*-
-"""가족 통합 일정표 웹 대시보드 - Flask + DB(PostgreSQL)"""
+"""가족 통합 일정표 웹 대시보드 - Flask + DB(PostgreSQL / SQLite)"""
 import os
+import re
+import gzip
 import json
+import hashlib
 import time
-from flask import Flask, render_template, request, jsonify
+import cProfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+import click
+from flask import Flask, Response, g, has_request_context, render_template, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 
-# DB 사용 여부: DATABASE_URL 이 있으면 PostgreSQL, 없으면 JSON 파일 사용
+import aggregates
+import calendar_ics
+import jsoncodec
+import metrics
+import recurrence
+import searchindex
+import timegrid
+import weeklayout
+from file_store import EventLogStore, JsonFileStore, StoreCorruptError, file_lock, journal_entry
+
+try:
+    import brotli  # 선택: pip install brotli 이 돼 있으면 br 압축도 한다
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 저장 방식: DATABASE_URL 이 있으면 그 DB(PostgreSQL), 없으면 CALENDAR_STORAGE 에 따라
+#   json  : 쓸 때마다 EVENTS_PATH 를 통째로 다시 씀 (기본)
+#   log   : 변경만 LOG_PATH 끝에 한 줄씩 붙이고, LOG_COMPACT_EVERY 줄마다 EVENTS_PATH(스냅샷)에 접어 넣음
+#   sqlite: SQLITE_PATH 의 SQLite 파일(WAL). DB 서버 없이 한 대에서 돌릴 때
+FILE_STORAGE = os.environ.get("CALENDAR_STORAGE", "json")
+SQLITE_PATH = os.environ.get("SQLITE_PATH", os.path.join(BASE_DIR, "family_calendar.db"))
 DATABASE_URL = os.environ.get("DATABASE_URL")
 if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+if not DATABASE_URL and FILE_STORAGE == "sqlite":
+    DATABASE_URL = "sqlite:///" + SQLITE_PATH
+# DB 연결 풀 (워커 프로세스마다 따로). gunicorn gthread 스레드 수(Procfile --threads)만큼은 있어야 기다리지 않는다.
+# RECYCLE 초보다 오래된 연결은 새로 맺는다 - 클라우드 PostgreSQL 이 오래 쉰 연결을 끊기 전에.
+# PRE_PING=1 이면 꺼낼 때마다 연결을 확인한다(요청마다 왕복 1번 추가라 기본은 끔).
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 4))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "0") == "1"
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+# 예전 슬롯 단위 파일(데스크톱 family.py 도 사용). 웹은 처음 한 번만 읽어 EVENTS_PATH 로 옮긴다.
 DATA_PATH = os.path.join(BASE_DIR, "family_pro_data.json")
+# 일정 단위 저장 파일: {"format": 2, "version": N, "events": {event_id: {...}}, "series": {series_id: {...}}}
+EVENTS_PATH = os.path.join(BASE_DIR, "family_events.json")
+LOG_PATH = os.path.join(BASE_DIR, "family_events.log")
+LOG_COMPACT_EVERY = int(os.environ.get("LOG_COMPACT_EVERY", 200))
+# 변경 기록(journal)에 남길 최근 버전 수. 다시 연결한 화면은 이 안이면 바뀐 것만 받는다.
+# json 저장은 쓸 때마다 기록까지 파일 전체를 다시 쓰므로 기본을 작게 잡는다.
+JOURNAL_KEEP = int(os.environ.get("CHANGE_JOURNAL_KEEP", 100 if not DATABASE_URL and FILE_STORAGE == "json" else 1000))
+
+
+class CodecJSONProvider(DefaultJSONProvider):
+    """jsonify / request.get_json 을 jsoncodec 으로 (orjson/msgspec 이 있으면 그쪽). 키 정렬은 하지 않는다."""
+
+    def dumps(self, obj, **kwargs):
+        return jsoncodec.dumps(obj, default=self.default).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return jsoncodec.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(jsoncodec.dumps(obj, default=self.default), mimetype=self.mimetype)
+
 
 app = Flask(__name__, template_folder=TEMPLATES_DIR)
+app.json = CodecJSONProvider(app)
+
+# ----- 계측 (/metrics) -----
+REQUEST_SECONDS = metrics.Histogram("calendar_request_seconds", "요청 처리 시간(초)", ("endpoint", "method", "status"))
+STORAGE_OPS = metrics.Counter("calendar_storage_ops_total", "저장소 읽기/쓰기 횟수", ("backend", "op"))
+SERIALIZED_BYTES = metrics.Counter("calendar_serialized_bytes_total", "JSON 으로 직렬화한 바이트", ("target",))
+DB_QUERY_SECONDS = metrics.Histogram("calendar_db_query_seconds", "SQL 문 실행 시간(초)", ("statement",))
 
 MEMBERS = {
     "아빠": "#BBDEFB",
@@ -23,22 +94,61 @@ MEMBERS = {
     "태현": "#C8E6C9"
 }
 DAYS_KR = ["일", "월", "화", "수", "목", "금", "토"]
-# 30분 단위: 06:00 ~ 24:00
-TIMES = []
-for h in range(6, 25):
-    for m in (0, 30):
-        if h == 24 and m == 30:
-            break
-        TIMES.append(f"{h:02d}:{m:02d}")
+# 시간표 칸: 기본 06:00 ~ 24:00, 30분 단위. 저장된 일정은 칸 번호로 남으므로 일정이 있는 뒤에는 바꾸지 않는다.
+GRID = timegrid.TimeGrid(int(os.environ.get("TIME_SLOT_MINUTES", 30)),
+                         int(os.environ.get("DAY_START_HOUR", 6)), int(os.environ.get("DAY_END_HOUR", 24)))
+TIMES = GRID.times
+TIME_INDEX = GRID.index
+# 달력 시간대: .ics 의 UTC(...Z)/TZID 시각을 이 시간대로 바꿔 칸에 놓는다. 서버가 도는 시간대와 상관없다.
+CALENDAR_TZ = os.environ.get("CALENDAR_TZ", "Asia/Seoul")
+CALENDAR_ZONE = calendar_ics.zone(CALENDAR_TZ)
+if CALENDAR_ZONE is None:
+    raise ValueError("unknown CALENDAR_TZ: %s" % CALENDAR_TZ)
 
 # ----- DB 사용 시 -----
 db_engine = None
 if DATABASE_URL:
     try:
-        from sqlalchemy import create_engine, Column, Integer, String, text
-        from sqlalchemy.orm import sessionmaker, declarative_base
+        from sqlalchemy import create_engine, event, insert, inspect, Column, DateTime, Index, Integer, String, Text, func, text
+        from sqlalchemy.orm import scoped_session, sessionmaker, declarative_base
         Base = declarative_base()
         class CalendarEvent(Base):
+            """일정 1건 = 1행. 슬롯(30분)별 응답 형태는 읽을 때 만든다."""
+            __tablename__ = "family_events"
+            id = Column(Integer, primary_key=True, autoincrement=True)
+            event_id = Column(String(64), nullable=False)
+            date = Column(String(10), nullable=False)
+            start_row = Column(Integer, nullable=False)
+            end_row = Column(Integer, nullable=False)
+            who = Column(String(32), nullable=False)
+            text = Column(String(512), nullable=False)
+            bg = Column(String(32), nullable=False)
+            memo = Column(String(512), nullable=True)
+            __table_args__ = (
+                Index("ix_family_events_event_id", "event_id", unique=True),
+                Index("ix_family_events_date_start", "date", "start_row"),
+            )
+        class CalendarSeries(Base):
+            """반복 일정 규칙 1개 = 1행. 하루하루의 일정은 읽을 때 요청 기간만큼 펼친다 (recurrence.py)."""
+            __tablename__ = "family_series"
+            id = Column(Integer, primary_key=True, autoincrement=True)
+            series_id = Column(String(64), nullable=False)
+            start_date = Column(String(10), nullable=False)
+            until = Column(String(10), nullable=True)
+            days = Column(String(32), nullable=False)         # "월,수"
+            interval = Column(Integer, nullable=False, default=1)
+            exceptions = Column(Text, nullable=False, default="[]")  # 빠진 날짜 JSON 목록
+            start_row = Column(Integer, nullable=False)
+            end_row = Column(Integer, nullable=False)
+            who = Column(String(32), nullable=False)
+            text = Column(String(512), nullable=False)
+            bg = Column(String(32), nullable=False)
+            memo = Column(String(512), nullable=True)
+            __table_args__ = (
+                Index("ix_family_series_series_id", "series_id", unique=True),
+            )
+        class LegacySlotEvent(Base):
+            """예전 슬롯 단위 테이블. 마이그레이션 때 읽기만 한다."""
             __tablename__ = "calendar_events"
             id = Column(Integer, primary_key=True, autoincrement=True)
             slot_key = Column(String(32), nullable=False)
@@ -47,91 +157,1022 @@ if DATABASE_URL:
             who = Column(String(32), nullable=False)
             event_id = Column(String(64), nullable=False)
             memo = Column(String(512), nullable=True)
-        db_engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-        Base.metadata.create_all(db_engine)
-        Session = sessionmaker(bind=db_engine)
+        class CalendarMeta(Base):
+            """key='version': 쓰기마다 1씩 올라가는 데이터 버전."""
+            __tablename__ = "calendar_meta"
+            key = Column(String(32), primary_key=True)
+            value = Column(Integer, nullable=False, default=0)
+        class CalendarChange(Base):
+            """쓰기 1번 = 1행. body 는 {"v", "put", "del", "sput", "sdel"} JSON (file_store.journal_entry)."""
+            __tablename__ = "calendar_changes"
+            version = Column(Integer, primary_key=True, autoincrement=False)
+            body = Column(Text, nullable=False)
+        class SchemaMigration(Base):
+            """적용된 스키마 버전 기록. MIGRATIONS 의 번호와 같다."""
+            __tablename__ = "schema_migrations"
+            version = Column(Integer, primary_key=True, autoincrement=False)
+            name = Column(String(64), nullable=False)
+            applied_at = Column(DateTime, nullable=False, server_default=func.now())
+        pool_options = {} if DATABASE_URL.startswith("sqlite") else {
+            "pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_recycle": DB_POOL_RECYCLE,
+            "pool_timeout": DB_POOL_TIMEOUT, "pool_use_lifo": True}
+        db_engine = create_engine(DATABASE_URL, pool_pre_ping=DB_POOL_PRE_PING, **pool_options)
+        if db_engine.dialect.name == "sqlite":
+            @event.listens_for(db_engine, "connect")
+            def _sqlite_pragmas(dbapi_conn, _record):
+                # WAL: 읽기가 쓰기를 막지 않음. 여러 워커가 동시에 쓰면 busy_timeout 만큼 기다린다.
+                cur = dbapi_conn.cursor()
+                cur.execute("PRAGMA journal_mode=WAL")
+                cur.execute("PRAGMA synchronous=NORMAL")
+                cur.execute("PRAGMA busy_timeout=5000")
+                cur.close()
+        @event.listens_for(db_engine, "before_cursor_execute")
+        def _query_start(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+        @event.listens_for(db_engine, "after_cursor_execute")
+        def _query_end(conn, cursor, statement, parameters, context, executemany):
+            DB_QUERY_SECONDS.observe(time.perf_counter() - conn.info["query_start"].pop(),
+                                     statement=statement.lstrip().split(None, 1)[0].upper())
+        @event.listens_for(db_engine, "handle_error")
+        def _query_error(ctx):
+            starts = ctx.connection.info.get("query_start") if ctx.connection is not None else None
+            if starts:
+                starts.pop()
+        session_factory = sessionmaker(bind=db_engine, expire_on_commit=False)
+        # 스레드(= 요청)마다 세션 하나. 요청이 끝나면 teardown 에서 치운다.
+        Session = scoped_session(session_factory)
     except Exception as e:
         db_engine = None
         print("DB init failed, using JSON:", e)
 
 
-def load_data():
-    if db_engine:
+_last_event_time = [0]   # 마지막으로 쓴 마이크로초
+_event_id_lock = threading.Lock()
+
+
+def new_event_id():
+    """시각 기반 id (예: 1767225600_123456). 같은 마이크로초에 여러 개 만들어도(대량 추가, 동시 요청) 겹치지 않게 한다.
+    정수 마이크로초로 센다 (float 초는 지금 값에서 마이크로초 아래가 부정확해 반올림하면 겹칠 수 있다)."""
+    with _event_id_lock:
+        us = max(time.time_ns() // 1000, _last_event_time[0] + 1)
+        _last_event_time[0] = us
+    return "%d_%06d" % divmod(us, 1000000)
+
+
+def slot_key(date_str, row):
+    return f"{date_str}_{TIMES[row]}"
+
+
+# make_display_text 가 붙이는 ' (09:00~11:00)'
+_TIME_SUFFIX_RE = re.compile(r" \(\d{2}:\d{2}~\d{2}:\d{2}\)$")
+
+
+def split_time_suffix(text):
+    """'수현: 영어수업 (09:00~11:00)' → ('수현: 영어수업', ' (09:00~11:00)'). 시각이 없으면 (text, '')."""
+    text = text or ""
+    m = _TIME_SUFFIX_RE.search(text)
+    return (text[:m.start()], m.group(0)) if m else (text, "")
+
+
+def make_display_text(who, content, start_row, end_row):
+    """'아빠: 수영' 또는 '아빠: 수영 (13:00~15:00)'. end_row 는 미포함 슬롯 인덱스."""
+    time_str = TIMES[start_row]
+    # 표시용 종료: 13:00~15:00 처럼 end_row가 15:00 슬롯 인덱스면 TIMES[end_row] 사용
+    end_display = TIMES[end_row] if end_row < len(TIMES) and end_row > start_row else (TIMES[end_row - 1] if end_row > start_row else None)
+    if end_display and end_display != time_str:
+        return f"{who}: {content} ({time_str}~{end_display})"
+    return f"{who}: {content}"
+
+
+def events_from_slots(data):
+    """예전 슬롯 키 데이터({"YYYY-MM-DD_HH:MM": [ev, ...]}) → 일정 목록.
+    같은 event_id 의 슬롯은 하나로 합치고, event_id 가 없던 항목은 슬롯마다 새 id 를 준다."""
+    merged = {}
+    used_ids = set()
+    for key in sorted(data):
+        items = data[key]
+        if not isinstance(items, list):
+            continue
+        date_str, _, time_str = key.partition("_")
+        row = TIME_INDEX.get(time_str)
+        if row is None:
+            print("migration: skip unknown slot", key)
+            continue
+        for idx, ev in enumerate(items):
+            if not isinstance(ev, dict):
+                continue
+            eid = ev.get("event_id") or f"legacy_{key}_{idx}"
+            group = (eid, date_str)
+            if group in merged:
+                e = merged[group]
+                e["start_row"] = min(e["start_row"], row)
+                e["end_row"] = max(e["end_row"], row + 1)
+                continue
+            if eid in used_ids:
+                # 같은 id 가 다른 날짜에도 있으면 날짜를 붙여 구분
+                eid = f"{eid}_{date_str}"
+            used_ids.add(eid)
+            merged[group] = {
+                "event_id": eid,
+                "date": date_str,
+                "start_row": row,
+                "end_row": row + 1,
+                "who": ev.get("who", ""),
+                "text": ev.get("text", ""),
+                "bg": ev.get("bg") or MEMBERS.get(ev.get("who"), "#ddd"),
+                "memo": ev.get("memo") or None,
+            }
+    return list(merged.values())
+
+
+def expand_slots(events):
+    """일정 목록 → 화면이 쓰는 슬롯 키 형태 {"YYYY-MM-DD_HH:MM": [{text, bg, who, event_id, memo?}]}."""
+    data = {}
+    for ev in events:
+        item = {"text": ev["text"], "bg": ev["bg"], "who": ev["who"], "event_id": ev["event_id"]}
+        if ev.get("memo"):
+            item["memo"] = ev["memo"]
+        for r in range(ev["start_row"], min(ev["end_row"], len(TIMES))):
+            data.setdefault(slot_key(ev["date"], r), []).append(dict(item))
+    return data
+
+
+# ----- DB 저장소 -----
+def row_to_event(r):
+    return {"event_id": r.event_id, "date": r.date, "start_row": r.start_row, "end_row": r.end_row,
+            "who": r.who, "text": r.text, "bg": r.bg, "memo": r.memo}
+
+
+def row_to_series(r):
+    return {"series_id": r.series_id, "date": r.start_date, "until": r.until, "days": r.days.split(","),
+            "interval": r.interval, "exceptions": json.loads(r.exceptions or "[]"),
+            "start_row": r.start_row, "end_row": r.end_row, "who": r.who, "text": r.text, "bg": r.bg, "memo": r.memo}
+
+
+def series_to_row(sr):
+    return {"series_id": sr["series_id"], "start_date": sr["date"], "until": sr.get("until"),
+            "days": ",".join(sr["days"]), "interval": sr.get("interval", 1),
+            "exceptions": json.dumps(sorted(sr.get("exceptions", []))),
+            "start_row": sr["start_row"], "end_row": sr["end_row"], "who": sr["who"], "text": sr["text"],
+            "bg": sr["bg"], "memo": sr.get("memo")}
+
+
+def migrate_legacy_db(session):
+    """calendar_events(슬롯마다 1행) → family_events(일정마다 1행). 옮긴 뒤 예전 테이블은 백업 이름으로 바꾼다."""
+    if not inspect(session.connection()).has_table(LegacySlotEvent.__tablename__):
+        return
+    if session.query(CalendarEvent.id).first() is not None:
+        return
+    data = {}
+    for r in session.query(LegacySlotEvent).order_by(LegacySlotEvent.slot_key, LegacySlotEvent.id):
+        ev = {"text": r.text, "bg": r.bg, "who": r.who, "event_id": r.event_id or None, "memo": r.memo}
+        data.setdefault(r.slot_key, []).append(ev)
+    for ev in events_from_slots(data):
+        session.add(CalendarEvent(**ev))
+    session.flush()
+    session.execute(text("ALTER TABLE calendar_events RENAME TO calendar_events_slot_backup"))
+    print("DB migration: %d slot rows → family_events" % sum(len(v) for v in data.values()))
+
+
+def create_event_table(session):
+    CalendarEvent.__table__.create(session.connection(), checkfirst=True)
+
+
+def create_event_indexes(session):
+    """event_id 조회(수정/삭제)와 날짜 범위 조회가 전체 스캔이 되지 않도록."""
+    existing = {ix["name"] for ix in inspect(session.connection()).get_indexes(CalendarEvent.__tablename__)}
+    for ix in CalendarEvent.__table__.indexes:
+        if ix.name not in existing:
+            ix.create(session.connection())
+
+
+def create_meta_table(session):
+    CalendarMeta.__table__.create(session.connection(), checkfirst=True)
+    if session.get(CalendarMeta, "version") is None:
+        session.add(CalendarMeta(key="version", value=0))
+
+
+def create_series_table(session):
+    CalendarSeries.__table__.create(session.connection(), checkfirst=True)
+
+
+def create_change_table(session):
+    CalendarChange.__table__.create(session.connection(), checkfirst=True)
+
+
+# (번호, 이름, 함수). 한 번 배포한 항목은 고치지 말고 뒤에 추가한다.
+MIGRATIONS = [
+    (1, "create_family_events", create_event_table),
+    (2, "migrate_slot_rows", migrate_legacy_db),
+    (3, "event_indexes", create_event_indexes),
+    (4, "calendar_meta_version", create_meta_table),
+    (5, "create_family_series", create_series_table),
+    (6, "create_calendar_changes", create_change_table),
+]
+
+
+@contextmanager
+def migration_lock(conn):
+    """마이그레이션은 한 프로세스만: PostgreSQL 은 advisory lock, SQLite 파일은 옆의 .lock 파일을 잠근다."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_lock(7321001)"))
+        conn.commit()
         try:
-            session = Session()
-            rows = session.query(CalendarEvent).order_by(CalendarEvent.slot_key, CalendarEvent.id).all()
-            data = {}
-            for r in rows:
-                key = r.slot_key
-                if key not in data:
-                    data[key] = []
-                ev = {"text": r.text, "bg": r.bg, "who": r.who, "event_id": r.event_id or None}
-                if getattr(r, "memo", None):
-                    ev["memo"] = r.memo
-                data[key].append(ev)
-            session.close()
-            return data
-        except Exception as e:
-            print("DB load error:", e)
-            return {}
-    # JSON fallback
-    if not os.path.exists(DATA_PATH):
-        return {}
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(7321001)"))
+            conn.commit()
+    elif conn.dialect.name == "sqlite" and db_engine.url.database not in (None, "", ":memory:"):
+        with file_lock(db_engine.url.database + ".lock"):
+            yield
+    else:
+        yield
+
+
+def run_migrations():
+    """시작할 때 아직 적용되지 않은 MIGRATIONS 를 순서대로, 하나씩 트랜잭션으로 적용한다.
+    gunicorn 워커가 동시에 떠도 migration_lock 으로 한 워커만 진행한다
+    (기록 테이블 만들기도 잠근 뒤에 한다. 두 워커가 함께 CREATE TABLE 하면 한쪽이 실패한다)."""
+    with db_engine.connect() as conn, migration_lock(conn):
+        SchemaMigration.__table__.create(conn, checkfirst=True)
+        conn.commit()
+        for version, name, fn in MIGRATIONS:
+            session = session_factory(bind=conn)
+            try:
+                if session.get(SchemaMigration, version) is not None:
+                    continue
+                fn(session)
+                session.add(SchemaMigration(version=version, name=name))
+                session.commit()
+                print("DB schema migration %d (%s) applied" % (version, name))
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+
+
+@contextmanager
+def db_transaction(snapshot=False):
+    """읽기/쓰기 한 번 = 트랜잭션 하나. 끝나면 커밋(오류면 롤백)해 연결을 바로 풀에 돌려준다.
+    안에서 다시 부르면 바깥 트랜잭션에 그대로 합쳐진다. snapshot 이면 PostgreSQL 에서 REPEATABLE READ 로
+    읽어 여러 쿼리가 같은 시점을 본다 (SQLite 는 트랜잭션 하나가 원래 한 시점)."""
+    session = Session()
+    if session.info.get("depth"):
+        session.info["depth"] += 1
+        try:
+            yield session
+        finally:
+            session.info["depth"] -= 1
+        return
+    session.info["depth"] = 1
+    try:
+        if snapshot and db_engine.dialect.name == "postgresql":
+            session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.info["depth"] = 0
+        if not has_request_context():
+            # 요청 밖(감시 스레드, CLI)은 teardown 이 없으므로 여기서 치운다
+            Session.remove()
+
+
+@app.teardown_appcontext
+def remove_db_session(exc):
+    if db_engine:
+        Session.remove()
+
+
+def db_load_events(date_from=None, date_to=None):
+    with db_transaction() as session:
+        q = session.query(CalendarEvent)
+        if date_from:
+            q = q.filter(CalendarEvent.date >= date_from)
+        if date_to:
+            q = q.filter(CalendarEvent.date <= date_to)
+        return [row_to_event(r) for r in q.order_by(CalendarEvent.id)]
+
+
+def db_get_event(event_id):
+    with db_transaction() as session:
+        r = session.query(CalendarEvent).filter(CalendarEvent.event_id == event_id).first()
+        return row_to_event(r) if r else None
+
+
+def db_load_series():
+    with db_transaction() as session:
+        return [row_to_series(r) for r in session.query(CalendarSeries).order_by(CalendarSeries.id)]
+
+
+def db_version():
+    with db_transaction() as session:
+        r = session.get(CalendarMeta, "version")
+        return r.value if r else 0
+
+
+def chunked(items, size=500):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def db_commit(puts=(), deletes=(), series_puts=(), series_deletes=()):
+    """puts(일정 dict, event_id 기준으로 새로 넣거나 덮어씀)와 deletes(event_id),
+    series_puts/series_deletes(반복 규칙)를 한 트랜잭션에 반영하고, 같은 트랜잭션에서 올린 새 데이터 버전을 돌려준다.
+    덮어쓸 행은 지우고 같은 id 로 다시 넣으므로, 건수와 상관없이 INSERT 는 executemany 한두 번이다."""
+    with db_transaction() as session:
+        # 버전 행을 먼저 고쳐 쓰기 잠금을 잡는다 (PostgreSQL 행 잠금 / SQLite 쓰기 잠금) → 버전 순서 = 커밋 순서
+        session.query(CalendarMeta).filter(CalendarMeta.key == "version").update(
+            {CalendarMeta.value: CalendarMeta.value + 1}, synchronize_session=False)
+        existing = {}
+        for ids in chunked(ev["event_id"] for ev in puts):
+            existing.update(session.query(CalendarEvent.event_id, CalendarEvent.id)
+                            .filter(CalendarEvent.event_id.in_(ids)).all())
+        for ids in chunked(list(deletes) + list(existing)):
+            session.query(CalendarEvent).filter(CalendarEvent.event_id.in_(ids)).delete(synchronize_session=False)
+        # 원래 id 를 유지해야 슬롯 안 순서(만든 순서)가 그대로다
+        keep_id = [dict(ev, id=existing[ev["event_id"]]) for ev in puts if ev["event_id"] in existing]
+        new_rows = [dict(ev) for ev in puts if ev["event_id"] not in existing]
+        if keep_id:
+            session.execute(insert(CalendarEvent), keep_id)
+        if new_rows:
+            session.execute(insert(CalendarEvent), new_rows)
+        gone = list(series_deletes) + [sr["series_id"] for sr in series_puts]
+        for ids in chunked(gone):
+            session.query(CalendarSeries).filter(CalendarSeries.series_id.in_(ids)).delete(synchronize_session=False)
+        if series_puts:
+            session.execute(insert(CalendarSeries), [series_to_row(sr) for sr in series_puts])
+        version = db_version()
+        rec = journal_entry({"v": version, "put": list(puts), "del": list(deletes),
+                             "sput": list(series_puts), "sdel": list(series_deletes)})
+        body = jsoncodec.dumps(rec)
+        SERIALIZED_BYTES.inc(len(body), target="db_journal")
+        session.add(CalendarChange(version=version, body=body.decode("utf-8")))
+        session.query(CalendarChange).filter(CalendarChange.version <= version - JOURNAL_KEEP).delete(
+            synchronize_session=False)
+    return version
+
+
+# ----- JSON 저장소 -----
+def empty_json_doc():
+    return {"format": 2, "version": 0, "events": {}, "series": {}, "journal": []}
+
+
+json_store = JsonFileStore(EVENTS_PATH, empty_json_doc)
+log_store = EventLogStore(json_store, LOG_PATH, LOG_COMPACT_EVERY, JOURNAL_KEEP) if FILE_STORAGE == "log" else None
+
+
+def read_json_store():
+    """깨진 파일을 빈 달력으로 여기고 덮어쓰지 않도록, 읽을 수 없으면 StoreCorruptError 를 그대로 올린다.
+    log 방식이면 스냅샷에 로그 뒷부분까지 재생한 상태를 같은 모양으로 돌려준다."""
+    if log_store:
+        version, events, series, journal = log_store.state()
+        return {"format": 2, "version": version, "events": events, "series": series, "journal": journal}
+    doc = json_store.read()
+    if not isinstance(doc.get("events"), dict):
+        raise StoreCorruptError("%s: no events object" % EVENTS_PATH)
+    doc.setdefault("version", 0)
+    doc.setdefault("series", {})
+    doc.setdefault("journal", [])
+    return doc
+
+
+def migrate_legacy_json():
+    """family_pro_data.json(슬롯 단위) → family_events.json(일정 단위). 새 파일이 이미 있으면 건너뛴다."""
+    if os.path.exists(EVENTS_PATH) or not os.path.exists(DATA_PATH):
+        return
     try:
         with open(DATA_PATH, "r", encoding="utf-8") as f:
             data = json.load(f)
-            if data and not isinstance(next(iter(data.values()), []), list):
-                return {}
-            return data
-    except Exception:
+    except Exception as e:
+        print("JSON migration skipped:", e)
+        return
+    if data and not isinstance(next(iter(data.values()), []), list):
+        return
+    events = events_from_slots(data)
+    json_store.write({"format": 2, "version": 0, "events": {ev["event_id"]: ev for ev in events}})
+    print("JSON migration: %d events → %s" % (len(events), os.path.basename(EVENTS_PATH)))
+
+
+if db_engine:
+    try:
+        run_migrations()
+    except Exception as e:
+        print("DB migration failed:", e)
+else:
+    migrate_legacy_json()
+    if log_store:
+        log_store.refresh()
+    else:
+        # log 방식에서 json 으로 바꿨으면 남은 로그를 먼저 스냅샷에 접어 넣는다
+        EventLogStore(json_store, LOG_PATH).compact()
+
+
+# ----- 저장소 공통 -----
+STORAGE_KIND = db_engine.dialect.name if db_engine else ("log" if log_store else "json")
+
+
+def count_storage(op):
+    STORAGE_OPS.inc(backend=STORAGE_KIND, op=op)
+
+
+def store_events(date_from=None, date_to=None):
+    count_storage("read_events")
+    if db_engine:
+        return db_load_events(date_from, date_to)
+    events = read_json_store()["events"].values()
+    return [ev for ev in events
+            if (not date_from or ev["date"] >= date_from) and (not date_to or ev["date"] <= date_to)]
+
+
+def store_series():
+    count_storage("read_series")
+    if db_engine:
+        return db_load_series()
+    return list(read_json_store()["series"].values())
+
+
+def store_get(event_id):
+    count_storage("read_event")
+    if db_engine:
+        return db_get_event(event_id)
+    return read_json_store()["events"].get(event_id)
+
+
+def store_load():
+    """(버전, 전체 일정 목록, 반복 규칙 목록, 변경 기록)을 저장소에서 직접 읽는다. DB 는 한 트랜잭션(같은 시점)에서 읽고,
+    변경 기록은 테이블에 있으므로 None."""
+    count_storage("read_all")
+    if db_engine:
+        with db_transaction(snapshot=True):
+            return db_version(), db_load_events(), db_load_series(), None
+    doc = read_json_store()
+    return doc["version"], list(doc["events"].values()), list(doc["series"].values()), list(doc["journal"])
+
+
+def store_stamp():
+    """다른 워커(gunicorn)의 쓰기를 알아채는 값. DB 는 버전 행, JSON 은 파일 mtime/크기."""
+    count_storage("stamp")
+    if db_engine:
+        return db_version()
+    if log_store:
+        return log_store.stamp()
+    return json_store.stamp()
+
+
+def store_commit(puts, deletes, series_puts=(), series_deletes=()):
+    """저장하고 (새 버전, 저장 직후 stamp) 를 돌려준다."""
+    count_storage("write")
+    if db_engine:
+        version = db_commit(puts, deletes, series_puts, series_deletes)
+        return version, version
+    if log_store:
+        result = log_store.append(puts, deletes, series_puts, series_deletes)
+        SERIALIZED_BYTES.inc(log_store.last_write_bytes, target="file")
+        return result
+    with json_store.transaction() as doc:
+        if not isinstance(doc.get("events"), dict):
+            raise StoreCorruptError("%s: no events object" % EVENTS_PATH)
+        for eid in deletes:
+            doc["events"].pop(eid, None)
+        for ev in puts:
+            doc["events"][ev["event_id"]] = ev
+        series = doc.setdefault("series", {})
+        for sid in series_deletes:
+            series.pop(sid, None)
+        for sr in series_puts:
+            series[sr["series_id"]] = sr
+        doc["version"] = doc.get("version", 0) + 1
+        journal = doc.setdefault("journal", [])
+        journal.append(journal_entry({"v": doc["version"], "put": list(puts), "del": list(deletes),
+                                      "sput": list(series_puts), "sdel": list(series_deletes)}))
+        del journal[:-JOURNAL_KEEP]
+    SERIALIZED_BYTES.inc(json_store.last_write_bytes, target="file")
+    return doc["version"], json_store.last_stamp
+
+
+def store_journal(since):
+    """(현재 버전, since 보다 새 변경 기록 목록). 파일 저장은 읽기 캐시에 든 기록에서 꺼낸다
+    (스트림이 변경마다 부르므로 그때마다 파일 전체를 다시 읽지 않는다)."""
+    if db_engine:
+        count_storage("read_journal")
+        with db_transaction(snapshot=True) as session:
+            rows = session.query(CalendarChange).filter(CalendarChange.version > since).order_by(CalendarChange.version)
+            return db_version(), [jsoncodec.loads(r.body) for r in rows]
+    with _cache_lock:
+        _cache_fresh()
+        return _cache["version"], [rec for rec in _cache["journal"] if rec["v"] > since]
+
+
+def changes_since(since):
+    """since 다음 버전부터 지금까지의 변경을 변경 API 응답과 같은 모양으로. 변경 기록만으로 이어 줄 수 없으면
+    (기록보다 오래됨, 가져오기 같은 큰 변경, 저장소가 바뀜) None → 받는 쪽이 전체를 다시 읽는다."""
+    version, journal = store_journal(since)
+    if since == version:
+        return []
+    if since > version or not journal or journal[0]["v"] != since + 1 or any(rec.get("reset") for rec in journal):
+        return None
+    return [{"version": rec["v"], "events": rec.get("put", []), "deleted": rec.get("del", []),
+             "series": rec.get("sput", []), "deleted_series": rec.get("sdel", [])} for rec in journal]
+
+
+def events_in_range(events, series, date_from=None, date_to=None):
+    """저장된 일정 + 반복 규칙을 기간만큼 펼친 일정을 날짜 순으로. 같은 날 안에서는 저장된 일정이 먼저."""
+    out = list(events) + recurrence.expand(series, date_from, date_to)
+    out.sort(key=lambda ev: ev["date"])
+    return out
+
+
+def instance_or_none(event_id, series_lookup):
+    """"<series_id>@<날짜>" 이고 그날 실제로 반복되는 경우에만 펼친 일정."""
+    series_id, date_str = recurrence.split_instance_id(event_id)
+    if not series_id:
+        return None
+    sr = series_lookup(series_id)
+    if sr is None or not recurrence.occurs_on(sr, date_str):
+        return None
+    return recurrence.make_instance(sr, date_str)
+
+
+# ----- 읽기 캐시 -----
+# 전체 일정을 메모리에 두고 날짜별로 찾는다. 읽을 때마다 store_stamp() 로 저장소가 바뀌었는지만 보고,
+# 이 워커의 쓰기는 캐시에 바로 반영(write-through), 다른 워커의 쓰기는 stamp 가 달라져 다시 읽는다.
+READ_CACHE = os.environ.get("READ_CACHE", "1") != "0"
+_cache_lock = threading.Lock()
+# search/series_search: 일정/반복 규칙 검색 색인 (searchindex.py), stats: 날짜별 통계 (aggregates.py).
+# 처음 쓸 때 만들고, 그 뒤로는 캐시와 같이 고친다. 캐시를 다시 읽으면 버리고(None) 다음에 쓸 때 다시 만든다
+# - 검색/통계를 부르지 않는 워커는 비용이 없다. journal: 파일 저장의 최근 변경 기록(DB 는 None - 테이블에서 읽는다).
+_cache = {"stamp": None, "version": None, "events": {}, "by_date": {}, "series": {}, "journal": None,
+          "search": None, "series_search": None, "stats": None}
+cache_stats = {"hits": 0, "misses": 0, "write_through": 0, "invalidations": 0}
+
+
+def _cache_put(ev):
+    old = _cache["events"].get(ev["event_id"])
+    if old is not None and old["date"] != ev["date"]:
+        _cache_remove(ev["event_id"])
+    elif old is not None and _cache["stats"] is not None:
+        _cache["stats"].remove(old)
+    _cache["events"][ev["event_id"]] = ev
+    _cache["by_date"].setdefault(ev["date"], {})[ev["event_id"]] = ev
+    if _cache["search"] is not None:
+        _cache["search"].put(ev["event_id"], ev)
+    if _cache["stats"] is not None:
+        _cache["stats"].add(ev)
+
+
+def _cache_remove(event_id):
+    ev = _cache["events"].pop(event_id, None)
+    if ev is None:
+        return
+    if _cache["search"] is not None:
+        _cache["search"].remove(event_id)
+    if _cache["stats"] is not None:
+        _cache["stats"].remove(ev)
+    day = _cache["by_date"].get(ev["date"])
+    if day is not None:
+        day.pop(event_id, None)
+        if not day:
+            del _cache["by_date"][ev["date"]]
+
+
+def _cache_fresh():
+    """캐시가 저장소와 같으면 그대로, 아니면 전부 다시 읽는다. _cache_lock 안에서 부른다."""
+    stamp = store_stamp()
+    if stamp is not None and stamp == _cache["stamp"]:
+        cache_stats["hits"] += 1
+        return
+    cache_stats["misses"] += 1
+    version, events, series, journal = store_load()
+    _cache.update(stamp=stamp, version=version, events={}, by_date={}, series={}, journal=journal, search=None,
+                  series_search=None, stats=None)
+    for ev in events:
+        _cache_put(ev)
+    for sr in series:
+        _cache_put_series(sr)
+
+
+def _cache_put_series(sr):
+    _cache["series"][sr["series_id"]] = sr
+    if _cache["series_search"] is not None:
+        _cache["series_search"].put(sr["series_id"], sr)
+
+
+def _cache_remove_series(series_id):
+    _cache["series"].pop(series_id, None)
+    if _cache["series_search"] is not None:
+        _cache["series_search"].remove(series_id)
+
+
+def load_events(date_from=None, date_to=None):
+    """일정 목록 (반복 일정은 기간 안의 것만 펼쳐서). date_from/date_to(양 끝 포함)를 주면 그 기간 것만."""
+    if not READ_CACHE:
+        return events_in_range(store_events(date_from, date_to), store_series(), date_from, date_to)
+    with _cache_lock:
+        _cache_fresh()
+        by_date = _cache["by_date"]
+        span = (date.fromisoformat(date_to) - date.fromisoformat(date_from)).days + 1 if date_from and date_to else None
+        if span is not None and span < len(by_date):
+            # 기간이 일정 있는 날 수보다 짧으면(보통의 주간 조회) 그 날짜들만 찾는다
+            d = date.fromisoformat(date_from)
+            days = [(d + timedelta(days=i)).isoformat() for i in range(span)]
+        else:
+            days = sorted(k for k in by_date
+                          if (not date_from or k >= date_from) and (not date_to or k <= date_to))
+        events = [dict(ev) for day in days for ev in by_date.get(day, {}).values()]
+        return events_in_range(events, list(_cache["series"].values()), date_from, date_to)
+
+
+def get_event(event_id):
+    """저장된 일정, 또는 반복 일정의 하루치("<series_id>@<날짜>")."""
+    if not READ_CACHE:
+        return store_get(event_id) or instance_or_none(event_id, get_series)
+    with _cache_lock:
+        _cache_fresh()
+        ev = _cache["events"].get(event_id)
+        if ev:
+            return dict(ev)
+        return instance_or_none(event_id, _cache["series"].get)
+
+
+def list_series():
+    """반복 규칙 전부 (사본)."""
+    if not READ_CACHE:
+        return store_series()
+    with _cache_lock:
+        _cache_fresh()
+        return [dict(sr) for sr in _cache["series"].values()]
+
+
+def get_series(series_id):
+    if not READ_CACHE:
+        return next((sr for sr in store_series() if sr["series_id"] == series_id), None)
+    with _cache_lock:
+        _cache_fresh()
+        sr = _cache["series"].get(series_id)
+        return dict(sr) if sr else None
+
+
+def get_version():
+    """현재 데이터 버전. 쓰기(commit_changes)마다 1씩 오른다."""
+    if not READ_CACHE:
+        return db_version() if db_engine else read_json_store()["version"]
+    with _cache_lock:
+        _cache_fresh()
+        return _cache["version"]
+
+
+# 기간 없이 검색하면 반복 일정은 오늘부터 이만큼만 펼친다 (끝없는 규칙도 있으므로)
+SEARCH_SERIES_DAYS = int(os.environ.get("SEARCH_SERIES_DAYS", 366))
+
+
+def search_text(ev):
+    """검색할 글: 내용과 메모. 표시 글의 '이름: ' 과 '(09:00~11:00)' 는 빼서 이름이나 시각 숫자로 걸리지 않게 한다."""
+    return "%s %s" % (event_content(ev), ev.get("memo") or "")
+
+
+def search_events(query="", who=None, date_from=None, date_to=None):
+    """query 의 낱말이 내용/메모에 모두 들어 있고 who 가 맞는 일정 → (버전, 날짜·시작 칸 순 목록).
+    색인은 읽기 캐시와 같이 움직이므로 READ_CACHE 와 상관없이 캐시를 쓴다. 반복 일정은 기간 안의 날마다 하나씩."""
+    with _cache_lock:
+        _cache_fresh()
+        if _cache["search"] is None:
+            _cache["search"] = searchindex.SearchIndex(text=search_text)
+            _cache["series_search"] = searchindex.SearchIndex(text=search_text)
+            for ev in _cache["events"].values():
+                _cache["search"].put(ev["event_id"], ev)
+            for sr in _cache["series"].values():
+                _cache["series_search"].put(sr["series_id"], sr)
+        found = {ev["event_id"]: dict(ev) for ev in _cache["search"].search(query, who)
+                 if (not date_from or ev["date"] >= date_from) and (not date_to or ev["date"] <= date_to)}
+        series = [dict(sr) for sr in _cache["series_search"].search(query, who)]
+        version = _cache["version"]
+    if date_from:
+        expanded = recurrence.expand(series, date_from, date_to)
+    else:
+        # 기간이 없으면 규칙마다 첫날부터 끝날까지 (이미 끝난 규칙 포함). 끝이 없으면 오늘 + SEARCH_SERIES_DAYS 까지
+        horizon = (date.today() + timedelta(days=SEARCH_SERIES_DAYS)).isoformat()
+        expanded = [ev for sr in series
+                    for ev in recurrence.expand([sr], sr["date"], min(sr.get("until") or horizon, horizon))]
+    for ev in expanded:
+        found.setdefault(ev["event_id"], ev)
+    return version, sorted(found.values(), key=lambda ev: (ev["date"], ev["start_row"], ev["event_id"]))
+
+
+def stats_summary(dates, group, rebuild=False):
+    """dates 기간의 통계를 group 으로 묶어 (버전, 묶음 목록, 검증 결과). 저장된 일정은 들고 있는 집계에서,
+    반복 일정은 기간만큼 펼쳐 그날 값에 얹는다. rebuild 면 처음부터 다시 세고, 들고 있던 값과 같았는지
+    (True/False, 처음 만든 경우 None)를 돌려준다."""
+    with _cache_lock:
+        _cache_fresh()
+        stats = _cache["stats"]
+        consistent = None
+        if stats is None or rebuild:
+            fresh = aggregates.DailyStats.from_events(_cache["events"].values(), len(TIMES))
+            if stats is not None:
+                consistent = stats.snapshot() == fresh.snapshot()
+            stats = _cache["stats"] = fresh
+        extra = {}
+        for ev in recurrence.expand(list(_cache["series"].values()), dates[0], dates[-1]):
+            extra.setdefault(ev["date"], []).append(ev)
+        groups = aggregates.summarize(stats, dates, group, GRID.slot_minutes, extra)
+        return _cache["version"], groups, consistent
+
+
+def commit_changes(puts=(), deletes=(), series_puts=(), series_deletes=()):
+    """일정 추가/수정(puts)과 삭제(deletes: event_id), 반복 규칙 추가/수정/삭제를 한 번에 저장하고 새 버전을 돌려준다."""
+    with _cache_lock:
+        version, stamp = store_commit(puts, deletes, series_puts, series_deletes)
+        if READ_CACHE and _cache["version"] == version - 1:
+            # 바로 앞 버전을 들고 있었으면 그 자리에서 고친다
+            for eid in deletes:
+                _cache_remove(eid)
+            for ev in puts:
+                _cache_put(dict(ev))
+            for sid in series_deletes:
+                _cache_remove_series(sid)
+            for sr in series_puts:
+                _cache_put_series(dict(sr))
+            if _cache["journal"] is not None:
+                _cache["journal"].append(journal_entry({"v": version, "put": list(puts), "del": list(deletes),
+                                                        "sput": list(series_puts), "sdel": list(series_deletes)}))
+                del _cache["journal"][:-JOURNAL_KEEP]
+            _cache.update(stamp=stamp, version=version)
+            cache_stats["write_through"] += 1
+        else:
+            _cache["stamp"] = None
+            cache_stats["invalidations"] += 1
+    notify_version(version)
+    return version
+
+
+# ----- 변경 알림 (SSE) -----
+# 이 프로세스의 쓰기는 commit_changes 가 바로 알리고, 다른 워커의 쓰기는 감시 스레드 하나가 FEED_POLL_SEC 마다
+# store_stamp() 를 보고 알아챈다. 열린 스트림이 몇 개든 저장소를 들여다보는 건 프로세스당 하나뿐이다.
+FEED_POLL_SEC = float(os.environ.get("FEED_POLL_SEC", 1.0))
+STREAM_KEEPALIVE_SEC = float(os.environ.get("STREAM_KEEPALIVE_SEC", 15))
+STREAM_MAX_SEC = float(os.environ.get("STREAM_MAX_SEC", 300))
+# 스트림 하나가 gthread 스레드 하나를 쥐고 있으므로 스레드 수(Procfile 의 --threads 8)보다 적게 연다.
+# 넘치면 503 + Retry-After 이고, 화면은 그동안 /api/changes 로 확인한다.
+STREAM_MAX_OPEN = int(os.environ.get("STREAM_MAX_OPEN", 4))
+STREAM_RETRY_AFTER_SEC = 30
+_feed_cond = threading.Condition()
+_feed = {"version": 0, "watcher": None, "streams": 0}
+
+
+def notify_version(version, exact=False):
+    """스트림들에 새 버전을 알린다. exact 가 아니면 더 큰 값만 받아들인다 (동시 쓰기의 알림 순서가 뒤바뀌어도 안전)."""
+    with _feed_cond:
+        if version > _feed["version"] or (exact and version != _feed["version"]):
+            _feed["version"] = version
+            _feed_cond.notify_all()
+
+
+def _watch_store():
+    stamp = None
+    while True:
+        try:
+            new_stamp = store_stamp()
+            if new_stamp != stamp:
+                stamp = new_stamp
+                notify_version(get_version(), exact=True)
+        except Exception as e:
+            print("feed watch error:", e)
+        time.sleep(FEED_POLL_SEC)
+
+
+def wait_for_version(known, timeout):
+    """버전이 known 과 달라질 때까지 최대 timeout 초 기다린다. 달라졌으면 True."""
+    with _feed_cond:
+        if _feed["watcher"] is None:
+            _feed["watcher"] = threading.Thread(target=_watch_store, name="calendar-feed", daemon=True)
+            _feed["watcher"].start()
+        return _feed_cond.wait_for(lambda: _feed["version"] > known, timeout)
+
+
+def sse_message(event_name, data, event_id=None):
+    lines = [] if event_id is None else ["id: %s" % event_id]
+    lines += ["event: " + event_name, "data: " + jsoncodec.dumps(data).decode("utf-8")]
+    return "\n".join(lines) + "\n\n"
+
+
+class ChangeSet:
+    """요청 하나(또는 대량 요청 전체)의 변경을 모았다가 commit() 에서 한 번에 저장한다.
+    get_event/get_series 는 아직 저장하지 않은 변경까지 반영해서 돌려준다."""
+
+    def __init__(self):
+        self.puts = {}
+        self.deletes = {}
+        self.series_puts = {}
+        self.series_deletes = {}
+        self.dates = set()   # 바뀐 일정이 있던 날짜와 옮겨 간 날짜 (응답의 layout)
+
+    def get_series(self, series_id):
+        if series_id in self.series_puts:
+            return self.series_puts[series_id]
+        if series_id in self.series_deletes:
+            return None
+        return get_series(series_id)
+
+    def get_event(self, event_id):
+        if event_id in self.puts:
+            return self.puts[event_id]
+        if event_id in self.deletes:
+            return None
+        ev = get_event(event_id)
+        if ev is not None and ev.get("series_id"):
+            # 반복 일정 하루치는 이번 변경(예외 추가 등)을 반영해서 다시 판단
+            ev = instance_or_none(event_id, self.get_series)
+        if ev is not None:
+            self.dates.add(ev["date"])   # 고치거나 지우기 전에 늘 찾아보므로 원래 날짜가 여기서 남는다
+        return ev
+
+    def put(self, ev):
+        ev = {k: v for k, v in ev.items() if k != "series_id"}
+        self.dates.add(ev["date"])
+        self.deletes.pop(ev["event_id"], None)
+        self.puts[ev["event_id"]] = ev
+
+    def delete(self, event_id):
+        self.puts.pop(event_id, None)
+        self.deletes[event_id] = True
+
+    def put_series(self, sr):
+        self.series_deletes.pop(sr["series_id"], None)
+        self.series_puts[sr["series_id"]] = sr
+
+    def delete_series(self, series_id):
+        self.series_puts.pop(series_id, None)
+        self.series_deletes[series_id] = True
+
+    def add_exception(self, series_id, date_str):
+        """반복 규칙에서 하루를 뺀다 (그날만 고치거나 지울 때)."""
+        sr = dict(self.get_series(series_id))
+        sr["exceptions"] = sorted(set(sr.get("exceptions", [])) | {date_str})
+        self.put_series(sr)
+
+    def empty(self):
+        return not (self.puts or self.deletes or self.series_puts or self.series_deletes)
+
+    def commit(self):
+        return commit_changes(list(self.puts.values()), list(self.deletes),
+                              list(self.series_puts.values()), list(self.series_deletes))
+
+    def response(self, version, **extra):
+        """변경 API 응답: 바뀐 일정과 새 버전, 그리고 layout = {바뀐 날짜: weeklayout.day_blocks(그날 일정)}.
+        화면은 layout 의 날짜만 갈아 끼운다. series/deleted_series 가 있거나 날짜가 너무 많으면 layout 을 빼고,
+        화면은 보이는 주를 다시 받는다 (펼치는 건 서버 몫)."""
+        body = {"ok": True, "version": version, "events": list(self.puts.values()), "deleted": list(self.deletes),
+                "series": list(self.series_puts.values()), "deleted_series": list(self.series_deletes)}
+        if (not self.empty() and not self.series_puts and not self.series_deletes
+                and len(self.dates) <= WEEK_LAYOUT_MAX_DAYS):
+            body["layout"] = {d: weeklayout.day_blocks(load_events(d, d)) for d in sorted(self.dates)}
+        body.update(extra)
+        return jsonify(body)
+
+
+def resolve_event_id(key, index):
+    """예전 방식(슬롯 키 + 슬롯 안 순번)으로 지정된 일정의 event_id."""
+    if not key or not isinstance(index, int) or index < 0:
+        return None
+    items = load_data(key[:10], key[:10]).get(key) or []
+    if index < len(items):
+        return items[index].get("event_id")
+    return None
+
+
+def week_range(today=None):
+    """오늘이 속한 주(월~일)의 (시작일, 종료일) 문자열. 화면의 주간 보기와 같은 기준."""
+    today = today or date.today()
+    start = today - timedelta(days=today.weekday())
+    return start.isoformat(), (start + timedelta(days=6)).isoformat()
+
+
+# 한 번에 조회할 수 있는 가장 긴 기간 (약 10년)
+RANGE_MAX_DAYS = 3660
+
+
+def parse_date_range(args, default_week=True):
+    """요청의 from/to(YYYY-MM-DD) → (date_from, date_to). 형식이 틀리거나 RANGE_MAX_DAYS 보다 길면 ValueError.
+    값이 없으면 default_week 일 때 이번 주, 아니면 (None, None) = 전체."""
+    date_from = (args.get("from") or "").strip()
+    date_to = (args.get("to") or "").strip()
+    if not date_from and not date_to:
+        return week_range() if default_week else (None, None)
+    if not date_from:
+        date_from = date_to
+    if not date_to:
+        date_to = date_from
+    d_from = datetime.strptime(date_from, "%Y-%m-%d").date()
+    d_to = datetime.strptime(date_to, "%Y-%m-%d").date()
+    if d_to < d_from:
+        raise ValueError("to < from")
+    if (d_to - d_from).days + 1 > RANGE_MAX_DAYS:
+        raise ValueError("range too long")
+    return d_from.isoformat(), d_to.isoformat()
+
+
+def load_data(date_from=None, date_to=None):
+    """슬롯 키(YYYY-MM-DD_HH:MM) → 일정 목록. date_from/date_to 를 주면 그 기간(양 끝 포함)만 반환."""
+    try:
+        return expand_slots(load_events(date_from, date_to))
+    except Exception as e:
+        print("load error:", e)
         return {}
 
 
 def parse_start_row(start_str):
-    """시작 시간 문자열(예: 13:30, 13) → 슬롯 인덱스."""
-    if not start_str or not str(start_str).strip():
-        return 0
-    s = str(start_str).strip()
-    for i, t in enumerate(TIMES):
-        if s == t or (len(s) <= 2 and t.startswith(s.zfill(2))):
-            return i
-    try:
-        n = int(s)
-        if 6 <= n <= 24:
-            for i, t in enumerate(TIMES):
-                if t == f"{n:02d}:00":
-                    return i
-            return min((n - 6) * 2, len(TIMES) - 1)
-    except ValueError:
-        pass
-    return 0
+    """시작 시간 문자열(예: 13:30, 13, 9:15, 0930, 21시) → 슬롯 인덱스. 칸 중간이면 그 칸, 모르면 0."""
+    return GRID.start_row(start_str)
 
 
 def parse_end_row(end_str, start_row):
-    """종료 시간(예: 16:00, 16) → end_row. 채울 슬롯은 range(start_row, end_row)로 end_row 미포함. 표시용 종료는 TIMES[end_row]."""
-    if not end_str or not str(end_str).strip():
-        return start_row + 1
-    end_str = str(end_str).strip()
-    for i, t in enumerate(TIMES):
-        if end_str == t or (len(end_str) <= 2 and t.startswith(end_str.zfill(2))):
-            if i <= start_row:
-                return start_row + 1
-            return i
+    """종료 시간(예: 16:00, 16) → end_row. 채울 슬롯은 range(start_row, end_row)로 end_row 미포함. 표시용 종료는 TIMES[end_row].
+    칸 중간이면 다음 칸까지 채운다."""
+    return GRID.end_row(end_str, start_row)
+
+
+# ----- 응답 압축 -----
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))
+
+
+@app.after_request
+def compress_response(resp):
+    """JSON 응답을 Accept-Encoding 에 맞춰 br(brotli 가 있으면) 또는 gzip 으로 압축한다. 작은 응답은 그대로."""
+    if (resp.status_code != 200 or resp.mimetype != "application/json" or resp.direct_passthrough
+            or resp.is_streamed or "Content-Encoding" in resp.headers):
+        return resp
+    resp.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(["br", "gzip"] if brotli else ["gzip"])
+    body = resp.get_data()
+    if not encoding or len(body) < COMPRESS_MIN_BYTES:
+        return resp
+    resp.set_data(brotli.compress(body, quality=5) if encoding == "br" else gzip.compress(body, compresslevel=6))
+    resp.headers["Content-Encoding"] = encoding
+    return resp
+
+
+# ----- 계측 -----
+# PROFILE_DIR 을 주면 요청마다 cProfile 결과를 그 폴더에 .prof 로 남긴다(한 번에 한 요청만, 느려지므로 평소엔 끔).
+# PROFILE_MIN_MS 보다 빨리 끝난 요청은 버린다. 보기: python -m pstats <파일> 또는 snakeviz.
+PROFILE_DIR = os.environ.get("PROFILE_DIR")
+PROFILE_MIN_MS = float(os.environ.get("PROFILE_MIN_MS", 0))
+_profile_lock = threading.Lock()
+_profile_seq = [0]   # _profile_lock 안에서만 늘린다
+
+# 값은 늘기만 하지만 캐시 dict 를 그대로 읽는 Gauge 라 _total(카운터 이름)을 붙이지 않는다
+metrics.Gauge("calendar_cache_ops", "읽기 캐시 적중/실패/갱신 횟수", lambda: {(k,): v for k, v in cache_stats.items()}, ("kind",))
+metrics.Gauge("calendar_cache_events", "읽기 캐시에 든 일정 수", lambda: len(_cache["events"]))
+metrics.Gauge("calendar_streams_open", "열려 있는 /api/stream 연결 수", lambda: _feed["streams"])
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    if PROFILE_DIR and _profile_lock.acquire(blocking=False):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+@app.after_request
+def record_response(resp):
+    # compress_response 보다 나중에 등록돼 먼저 불리므로 압축 전 크기다
+    g.response_status = resp.status_code
+    if resp.mimetype == "application/json" and not resp.is_streamed and not resp.direct_passthrough:
+        SERIALIZED_BYTES.inc(resp.content_length or 0, target="response")
+    return resp
+
+
+@app.teardown_request
+def finish_request_timer(exc):
+    start = g.pop("request_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    status = 500 if exc is not None else g.pop("response_status", 500)
+    # 스트림은 연결이 끊길 때(최대 STREAM_MAX_SEC)에야 끝나므로 처리 시간 분포를 흐린다. 연결 수는 calendar_streams_open 으로 본다.
+    if endpoint != "/api/stream":
+        REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, method=request.method, status=status)
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return
     try:
-        h = int(end_str)
-        if 6 <= h <= 24:
-            for i, t in enumerate(TIMES):
-                if t == f"{h:02d}:00":
-                    if i <= start_row:
-                        return start_row + 1
-                    return i
-            idx = (h - 6) * 2
-            if idx <= start_row:
-                return start_row + 1
-            return min(idx, len(TIMES))
-    except ValueError:
-        pass
-    return start_row + 1
+        profiler.disable()
+        if elapsed * 1000 >= PROFILE_MIN_MS:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            # 같은 초에 끝난 요청, 같은 폴더를 쓰는 다른 워커와 이름이 겹치지 않게 pid 와 일련번호를 붙인다
+            _profile_seq[0] += 1
+            name = "%s_%d-%d_%s_%s_%dms.prof" % (time.strftime("%Y%m%d-%H%M%S"), os.getpid(), _profile_seq[0],
+                                                 request.method, endpoint.strip("/").replace("/", "_") or "index",
+                                                 elapsed * 1000)
+            profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+    finally:
+        _profile_lock.release()
 
 
 @app.route("/")
@@ -139,17 +1180,249 @@ def index():
     return render_template("index.html", members=MEMBERS, days_kr=DAYS_KR, times=TIMES)
 
 
+# 같은 버전의 같은 요청(경로+기간)은 직렬화한 바이트를 그대로 돌려준다. 버전이 바뀌면 전부 버린다.
+ENCODED_CACHE_SIZE = int(os.environ.get("ENCODED_CACHE_SIZE", 32))
+_encoded_lock = threading.Lock()
+_encoded = {"version": None, "bodies": OrderedDict()}
+encoded_stats = {"hits": 0, "misses": 0}
+
+
+def encoded_body(key, version, build):
+    """build(version) 을 직렬화한 바이트. (key, version) 이 같으면 다시 만들지 않는다 (최근 ENCODED_CACHE_SIZE 개)."""
+    with _encoded_lock:
+        if _encoded["version"] != version:
+            _encoded.update(version=version, bodies=OrderedDict())
+        body = _encoded["bodies"].get(key)
+        if body is not None:
+            _encoded["bodies"].move_to_end(key)
+            encoded_stats["hits"] += 1
+            return body
+    body = jsoncodec.dumps(build(version), default=app.json.default)
+    with _encoded_lock:
+        encoded_stats["misses"] += 1
+        if _encoded["version"] == version and ENCODED_CACHE_SIZE > 0:
+            _encoded["bodies"][key] = body
+            while len(_encoded["bodies"]) > ENCODED_CACHE_SIZE:
+                _encoded["bodies"].popitem(last=False)
+    return body
+
+
+def versioned_json(build, cache_key=None):
+    """build(version) 의 결과를 JSON 으로. ETag 는 데이터 버전 + cache_key(경로와 실제 기간)라, 브라우저가
+    If-None-Match 로 같은 것을 보내면 읽지도 직렬화하지도 않고 304. 기간을 빼고 부른 "이번 주" 는 주가 바뀌면
+    ETag 도 바뀐다. cache_key 를 주면 직렬화한 바이트를 버전별로 재사용한다."""
+    version = get_version()
+    etag = "v%d" % version if cache_key is None else "v%d-%s" % (version, "-".join(str(k) for k in cache_key))
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+        resp.vary.add("Accept-Encoding")   # 200 과 같은 Vary 여야 캐시가 압축본/원본을 섞지 않는다
+    elif cache_key is not None:
+        resp = app.response_class(encoded_body(cache_key, version, build), mimetype="application/json")
+    else:
+        resp = jsonify(build(version))
+    resp.set_etag(etag, weak=True)
+    resp.headers["X-Calendar-Version"] = str(version)
+    resp.headers["Cache-Control"] = "no-cache"  # 저장은 하되 쓸 때마다 ETag 로 확인
+    return resp
+
+
 @app.route("/api/data", methods=["GET"])
 def api_get_data():
-    return jsonify(load_data())
+    try:
+        date_from, date_to = parse_date_range(request.args)
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_range"}), 400
+    return versioned_json(lambda version: load_data(date_from, date_to), ("data", date_from, date_to))
 
 
-@app.route("/api/event", methods=["POST"])
-def api_add_event():
-    payload = request.get_json() or {}
+WEEK_LAYOUT_MAX_DAYS = 42
+
+
+@app.route("/api/week-layout", methods=["GET"])
+def api_week_layout():
+    """화면 배치: {"version", "from", "to", "days": {날짜: [{"start_row", "end_row", "lanes", "events": [...]}]}}.
+    각 일정에는 start_row/end_row(미포함)와 lane(묶음 안 몇 번째 열)이 붙는다 (weeklayout.py)."""
+    try:
+        date_from, date_to = parse_date_range(request.args)
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_range"}), 400
+    d_from = date.fromisoformat(date_from)
+    dates = [(d_from + timedelta(days=i)).isoformat()
+             for i in range((date.fromisoformat(date_to) - d_from).days + 1)]
+    if len(dates) > WEEK_LAYOUT_MAX_DAYS:
+        return jsonify({"ok": False, "error": "invalid_range"}), 400
+    return versioned_json(lambda version: {
+        "version": version, "from": date_from, "to": date_to,
+        "days": weeklayout.week_layout(load_events(date_from, date_to), dates),
+    }, ("week-layout", date_from, date_to))
+
+
+STATS_GROUPS = ("member", "day", "week", "month")
+STATS_MAX_DAYS = 1100
+
+
+@app.route("/api/stats", methods=["GET"])
+def api_stats():
+    """통계: from/to(없으면 이번 주), group=member|day|week|month(기본 member).
+    → {"ok", "version", "group", "from", "to", "slot_minutes", "groups": [{"key", "from", "to", "slots", "hours",
+    "overlaps", "members": {가족: {"slots", "hours", "days"}}}]}. rebuild=1 이면 다시 세고 "consistent" 를 붙인다."""
+    group = request.args.get("group", "member")
+    try:
+        date_from, date_to = parse_date_range(request.args)
+        if group not in STATS_GROUPS:
+            raise ValueError("bad group")
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_input"}), 400
+    d_from = date.fromisoformat(date_from)
+    days = (date.fromisoformat(date_to) - d_from).days + 1
+    if days > STATS_MAX_DAYS:
+        return jsonify({"ok": False, "error": "invalid_range"}), 400
+    dates = [(d_from + timedelta(days=i)).isoformat() for i in range(days)]
+    version, groups, consistent = stats_summary(dates, group, rebuild=request.args.get("rebuild") == "1")
+    body = {"ok": True, "version": version, "group": group, "from": date_from, "to": date_to,
+            "slot_minutes": GRID.slot_minutes, "groups": groups}
+    if consistent is not None:
+        body["consistent"] = consistent
+    return jsonify(body)
+
+
+SEARCH_PAGE_MAX = 200
+
+
+@app.route("/api/search", methods=["GET"])
+def api_search():
+    """일정 검색: q(낱말, 띄어 쓰면 모두 포함), who(가족), from/to(없으면 전체), offset/limit(페이지).
+    → {"ok", "version", "total", "offset", "limit", "events": [일정...]}. 한 일정은 한 번만 나온다(슬롯별이 아님)."""
+    try:
+        date_from, date_to = parse_date_range(request.args, default_week=False)
+        offset = int(request.args.get("offset", 0))
+        limit = int(request.args.get("limit", 50))
+        if offset < 0 or not 0 < limit <= SEARCH_PAGE_MAX:
+            raise ValueError("bad page")
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_input"}), 400
+    who = (request.args.get("who") or "").strip() or None
+    version, events = search_events(request.args.get("q", ""), who, date_from, date_to)
+    return jsonify({"ok": True, "version": version, "total": len(events), "offset": offset, "limit": limit,
+                    "events": events[offset:offset + limit]})
+
+
+@app.route("/api/changes", methods=["GET"])
+def api_changes():
+    """since 버전 이후의 변경을 합쳐서: 바뀐 일정은 마지막 상태로, 지운 일정은 id 만(tombstone).
+    from/to 를 주면 그 기간 밖의 일정은 빼고, 기간 밖으로 옮겨 간 일정은 deleted 에 넣는다.
+    변경 기록으로 이어 줄 수 없으면 {"reset": true} → 화면은 /api/data 로 전체를 다시 받는다."""
+    try:
+        since = int(request.args.get("since", ""))
+        date_from, date_to = parse_date_range(request.args, default_week=False)
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_input"}), 400
+    changes = changes_since(since)
+    if changes is None:
+        return jsonify({"ok": True, "reset": True, "version": get_version()})
+    events, series = {}, {}
+    for ch in changes:
+        events.update((eid, None) for eid in ch["deleted"])
+        events.update((ev["event_id"], ev) for ev in ch["events"])
+        series.update((sid, None) for sid in ch["deleted_series"])
+        series.update((sr["series_id"], sr) for sr in ch["series"])
+
+    def in_range(ev):
+        return ev is not None and (not date_from or ev["date"] >= date_from) and (not date_to or ev["date"] <= date_to)
+
+    return jsonify({
+        "ok": True,
+        "since": since,
+        "version": changes[-1]["version"] if changes else since,
+        "events": [ev for ev in events.values() if in_range(ev)],
+        "deleted": [eid for eid, ev in events.items() if not in_range(ev)],
+        "series": [sr for sr in series.values() if sr is not None],
+        "deleted_series": [sid for sid, sr in series.items() if sr is None],
+    })
+
+
+@app.route("/api/stream", methods=["GET"])
+def api_stream():
+    """변경을 Server-Sent Events 로 보낸다: id=버전, event=change, data=변경 API 응답과 같은 모양.
+    since(다시 연결할 때는 브라우저가 보내는 Last-Event-ID) 다음 버전부터 보내고, 변경 기록으로 이어 줄 수 없으면
+    event=reset 을 보내 화면이 전체를 다시 받게 한다. STREAM_MAX_SEC 가 지나면 끊고, 브라우저가 이어서 다시 연결한다.
+    이 워커에 이미 STREAM_MAX_OPEN 개가 열려 있으면 503 (Retry-After)."""
+    since = request.headers.get("Last-Event-ID") or request.args.get("since")
+    try:
+        since = int(since)
+    except (TypeError, ValueError):
+        since = get_version()
+    with _feed_cond:
+        if _feed["streams"] >= STREAM_MAX_OPEN:
+            resp = jsonify({"ok": False, "error": "too_many_streams"})
+            resp.status_code = 503
+            resp.headers["Retry-After"] = str(STREAM_RETRY_AFTER_SEC)
+            return resp
+        _feed["streams"] += 1
+
+    def close_stream():
+        with _feed_cond:
+            _feed["streams"] -= 1
+
+    def events():
+        last = since
+        deadline = time.monotonic() + STREAM_MAX_SEC
+        yield "retry: 3000\n\n"
+        while time.monotonic() < deadline:
+            changes = changes_since(last)
+            if changes is None:
+                last = get_version()
+                yield sse_message("reset", {"version": last}, last)
+            for ch in changes or ():
+                last = ch["version"]
+                yield sse_message("change", ch, last)
+            if not wait_for_version(last, min(STREAM_KEEPALIVE_SEC, max(0, deadline - time.monotonic()))):
+                yield ": keepalive\n\n"
+
+    resp = Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # 끝까지 보냈든 브라우저가 먼저 끊었든 서버가 응답을 닫을 때 자리를 돌려준다
+    resp.call_on_close(close_stream)
+    return resp
+
+
+@app.route("/metrics", methods=["GET"])
+def api_metrics():
+    """Prometheus 수집용. 값은 이 워커 프로세스 것만이다."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/api/cache", methods=["GET"])
+def api_cache_stats():
+    with _cache_lock:
+        return jsonify(dict(cache_stats, enabled=READ_CACHE, version=_cache["version"], events=len(_cache["events"]),
+                            encoded=dict(encoded_stats, entries=len(_encoded["bodies"])), codec=jsoncodec.NAME))
+
+
+class InvalidInput(ValueError):
+    """요청 값이 잘못됨 → 400 {"error": "invalid_input"}."""
+
+
+def valid_date_str(value):
+    """날짜 문자열 → 'YYYY-MM-DD' (2026-3-1 도 2026-03-01 로). 형식이 틀렸거나 없는 날짜(2026-02-30)면 InvalidInput.
+    내보내기에서 하루 뒤(24:00)를 계산하므로 9999-12-31 도 받지 않는다."""
+    try:
+        d = datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise InvalidInput("date_str")
+    if d == date.max:
+        raise InvalidInput("date_str")
+    return d.isoformat()
+
+
+def event_from_payload(payload):
+    """추가 요청(date_str, start_time|time_index, end_time, who, content, memo) → 새 일정 dict."""
     date_str = payload.get("date_str")
     start_time_str = (payload.get("start_time") or "").strip()
-    time_index = int(payload.get("time_index", -1))
+    try:
+        time_index = int(payload.get("time_index", -1))
+    except (TypeError, ValueError):
+        raise InvalidInput("time_index")
     if time_index < 0 and start_time_str:
         time_index = parse_start_row(start_time_str)
     elif time_index < 0:
@@ -160,8 +1433,7 @@ def api_add_event():
     content = payload.get("content", "").strip()
     memo = payload.get("memo", "").strip()
 
-    if not date_str or content is None:
-        return jsonify({"ok": False, "error": "invalid_input"}), 400
+    date_str = valid_date_str(date_str)
 
     if who not in MEMBERS:
         who = "아빠"
@@ -169,105 +1441,28 @@ def api_add_event():
     end_row = parse_end_row(end_time_input, time_index)
     end_row = min(end_row, len(TIMES))
 
-    event_id = str(time.time()).replace(".", "_")
-    time_str = TIMES[time_index]
-    # 표시용 종료: 13:00~15:00 처럼 end_row가 15:00 슬롯 인덱스면 TIMES[end_row] 사용
-    end_display = TIMES[end_row] if end_row < len(TIMES) and end_row > time_index else (TIMES[end_row - 1] if end_row > time_index else None)
-    display_text = f"{who}: {content}"
-    if end_display and end_display != time_str:
-        display_text = f"{who}: {content} ({time_str}~{end_display})"
+    return {
+        "event_id": new_event_id(),
+        "date": date_str,
+        "start_row": time_index,
+        "end_row": end_row,
+        "who": who,
+        "text": make_display_text(who, content, time_index, end_row),
+        "bg": MEMBERS[who],
+        "memo": memo or None,
+    }
 
-    if db_engine:
-        try:
-            session = Session()
-            for r in range(time_index, end_row):
-                key = f"{date_str}_{TIMES[r]}"
-                ev = CalendarEvent(slot_key=key, text=display_text, bg=MEMBERS[who], who=who, event_id=event_id, memo=memo or None)
-                session.add(ev)
-            session.commit()
-            session.close()
-            return jsonify({"ok": True, "data": load_data()})
-        except Exception as e:
-            if session:
-                session.rollback()
-                session.close()
-            return jsonify({"ok": False, "error": str(e)}), 500
-
-    # JSON fallback
-    data = load_data()
-    new_entry = {"text": display_text, "bg": MEMBERS[who], "who": who, "event_id": event_id}
-    if memo:
-        new_entry["memo"] = memo
-    for r in range(time_index, end_row):
-        key = f"{date_str}_{TIMES[r]}"
-        if key not in data or not isinstance(data[key], list):
-            data[key] = []
-        data[key].append(new_entry.copy())
-    with open(DATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
-    return jsonify({"ok": True, "data": load_data()})
 
+def event_id_from_payload(payload):
+    """삭제/수정 대상: event_id, 없으면 예전 방식(key + index)."""
+    eid = payload.get("event_id") or resolve_event_id(payload.get("key"), payload.get("index", -1))
+    if not eid:
+        raise InvalidInput("event_id")
+    return eid
 
-@app.route("/api/event/delete", methods=["POST"])
-def api_delete_event():
-    payload = request.get_json() or {}
-    key = payload.get("key")
-    index = payload.get("index", -1)
-    event_id = payload.get("event_id")
-
-    if db_engine:
-        try:
-            session = Session()
-            eid = event_id
-            if not eid and key is not None and 0 <= index:
-                data = load_data()
-                if key in data and isinstance(data[key], list) and 0 <= index < len(data[key]):
-                    eid = data[key][index].get("event_id")
-            if eid:
-                session.query(CalendarEvent).filter(CalendarEvent.event_id == eid).delete()
-            session.commit()
-            session.close()
-            return jsonify({"ok": True, "data": load_data()})
-        except Exception as e:
-            if session:
-                session.rollback()
-                session.close()
-            return jsonify({"ok": False, "error": str(e)}), 500
 
-    data = load_data()
-    if event_id:
-        for k in list(data.keys()):
-            if not isinstance(data.get(k), list):
-                continue
-            data[k] = [e for e in data[k] if e.get("event_id") != event_id]
-            if not data[k]:
-                del data[k]
-    elif key and key in data and isinstance(data[key], list) and 0 <= index < len(data[key]):
-        event = data[key][index]
-        eid = event.get("event_id") if isinstance(event, dict) else None
-        if eid:
-            for k in list(data.keys()):
-                if not isinstance(data.get(k), list):
-                    continue
-                data[k] = [e for e in data[k] if e.get("event_id") != eid]
-                if not data[k]:
-                    del data[k]
-        else:
-            del data[key][index]
-            if not data[key]:
-                del data[key]
-    else:
-        return jsonify({"ok": False, "error": "invalid_input"}), 400
-    with open(DATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
-    return jsonify({"ok": True, "data": load_data()})
-
-
-@app.route("/api/event/update", methods=["POST"])
-def api_update_event():
-    payload = request.get_json() or {}
-    key = payload.get("key")
-    index = payload.get("index", -1)
+def updated_event(payload, lookup=None):
+    """수정 요청 → 고친 일정 dict. lookup(event_id) 로 현재 일정을 찾는다 (기본: get_event)."""
     event_id = payload.get("event_id")
     content = payload.get("content", "").strip()
     who = payload.get("who", "아빠")
@@ -282,100 +1477,416 @@ def api_update_event():
     if who not in MEMBERS:
         who = "아빠"
     if not content:
-        return jsonify({"ok": False, "error": "invalid_input"}), 400
+        raise InvalidInput("content")
 
     def new_text(ev_text):
-        time_suffix = ""
-        if " (" in ev_text and "~" in ev_text and ")" in ev_text:
-            idx = ev_text.rfind(" (")
-            if idx >= 0:
-                time_suffix = ev_text[idx:]
-        return f"{who}: {content}{time_suffix}"
-
-    # 시간 변경: 삭제 후 새 시간대로 추가
-    if event_id and date_str is not None and start_time_index is not None and db_engine:
-        end_row = parse_end_row(end_time_input, start_time_index)
-        end_row = min(end_row, len(TIMES))
-        time_str = TIMES[start_time_index]
-        end_display = TIMES[end_row] if end_row < len(TIMES) and end_row > start_time_index else (TIMES[end_row - 1] if end_row > start_time_index else None)
-        display_text = f"{who}: {content}"
-        if end_display and end_display != time_str:
-            display_text = f"{who}: {content} ({time_str}~{end_display})"
+        return f"{who}: {content}{split_time_suffix(ev_text)[1]}"
+
+    ev = (lookup or get_event)(event_id_from_payload(payload))
+    if ev is None:
+        raise InvalidInput("not_found")
+    ev = dict(ev)
+    if event_id and date_str is not None and start_time_index is not None:
+        # 시간 변경: 같은 행의 날짜/시작/종료를 바꾼다
         try:
-            session = Session()
-            session.query(CalendarEvent).filter(CalendarEvent.event_id == event_id).delete()
-            for r in range(start_time_index, end_row):
-                slot_key = f"{date_str}_{TIMES[r]}"
-                ev = CalendarEvent(slot_key=slot_key, text=display_text, bg=MEMBERS[who], who=who, event_id=event_id, memo=memo or None)
-                session.add(ev)
-            session.commit()
-            session.close()
-            return jsonify({"ok": True, "data": load_data()})
-        except Exception as e:
-            if session:
-                session.rollback()
-                session.close()
-            return jsonify({"ok": False, "error": str(e)}), 500
+            start_row = max(0, min(int(start_time_index), len(TIMES) - 1))
+        except (TypeError, ValueError):
+            raise InvalidInput("start_time_index")
+        end_row = min(parse_end_row(end_time_input, start_row), len(TIMES))
+        ev.update(date=valid_date_str(date_str), start_row=start_row, end_row=end_row,
+                  text=make_display_text(who, content, start_row, end_row))
+    else:
+        ev["text"] = new_text(ev.get("text", ""))
+    ev.update(who=who, bg=MEMBERS[who], memo=memo or None)
+    return ev
 
-    if db_engine:
+
+def apply_add(cs, payload):
+    """추가 요청을 cs 에 담고 새 id 를 돌려준다. repeat 가 있으면 일정 대신 반복 규칙을 만든다."""
+    ev = event_from_payload(payload)
+    repeat = payload.get("repeat")
+    if not repeat:
+        cs.put(ev)
+        return ev["event_id"]
+    try:
+        days, interval, until = recurrence.parse_repeat(repeat, ev["date"])
+    except (TypeError, ValueError):
+        raise InvalidInput("repeat")
+    sr = {k: ev[k] for k in recurrence.SERIES_FIELDS}
+    sr.update(series_id="s" + ev["event_id"], date=ev["date"], until=until, days=days, interval=interval, exceptions=[])
+    cs.put_series(sr)
+    return sr["series_id"]
+
+
+def apply_update(cs, payload):
+    """수정 요청을 cs 에 담고 event_id 를 돌려준다.
+    반복 일정 하루치는 그날만 보통 일정으로 떼어 내고(같은 id), scope 가 "series" 면 규칙 전체를 고친다."""
+    ev = updated_event(payload, cs.get_event)
+    series_id = ev.pop("series_id", None)
+    if payload.get("scope") == "series":
+        series_id = series_id or recurrence.split_instance_id(ev["event_id"])[0]
+        sr = cs.get_series(series_id) if series_id else None
+        if sr is None:
+            raise InvalidInput("not_found")
+        sr = dict(sr)
+        sr.update({k: ev[k] for k in recurrence.SERIES_FIELDS})
+        cs.put_series(sr)
+        return ev["event_id"]
+    if series_id:
+        cs.add_exception(series_id, recurrence.split_instance_id(ev["event_id"])[1])
+    cs.put(ev)
+    return ev["event_id"]
+
+
+def apply_delete(cs, payload, strict=False):
+    """삭제 요청을 cs 에 담고 event_id 를 돌려준다. strict 면 없는 일정은 InvalidInput."""
+    eid = event_id_from_payload(payload)
+    series_id, date_str = recurrence.split_instance_id(eid)
+    if payload.get("scope") == "series":
+        sr = cs.get_series(series_id) if series_id else None
+        if sr is None:
+            raise InvalidInput("not_found")
+        # 그날만 고쳐 둔 일정들도 함께 지운다
+        for d in sr.get("exceptions", ()):
+            cs.delete(recurrence.instance_id(series_id, d))
+        cs.delete_series(series_id)
+        return eid
+    ev = cs.get_event(eid)
+    if ev is not None and ev.get("series_id"):
+        cs.add_exception(series_id, date_str)
+    elif ev is None:
+        # 이미 없는 일정: 지울 것이 없으므로 아무것도 담지 않는다 (버전, 변경 기록 그대로)
+        if strict:
+            raise InvalidInput("not_found")
+    else:
+        cs.delete(eid)
+    return eid
+
+
+def single_change(apply):
+    """추가/수정/삭제 API 하나: 요청을 ChangeSet 에 담아 저장하고 바뀐 것만 응답한다."""
+    payload = request.get_json() or {}
+    cs = ChangeSet()
+    try:
+        apply(cs, payload)
+        version = get_version() if cs.empty() else cs.commit()
+    except InvalidInput:
+        return jsonify({"ok": False, "error": "invalid_input"}), 400
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 500
+    return cs.response(version)
+
+
+@app.route("/api/event", methods=["POST"])
+def api_add_event():
+    return single_change(apply_add)
+
+
+@app.route("/api/event/delete", methods=["POST"])
+def api_delete_event():
+    return single_change(apply_delete)
+
+
+@app.route("/api/event/update", methods=["POST"])
+def api_update_event():
+    return single_change(apply_update)
+
+
+BULK_MAX_OPS = int(os.environ.get("BULK_MAX_OPS", 5000))
+BULK_OPS = {"add": apply_add, "update": apply_update,
+            "delete": lambda cs, item: apply_delete(cs, item, strict=True)}
+
+
+@app.route("/api/events/bulk", methods=["POST"])
+def api_bulk_events():
+    """여러 개의 추가/수정/삭제를 한 번에. 요청: {"ops": [{"op": "add"|"update"|"delete", ...각 API 와 같은 필드}]}
+    잘못된 항목은 건너뛰고 results 에 이유를 적으며, 나머지는 한 트랜잭션(JSON 은 한 번의 저장)으로 반영한다.
+    같은 요청 안에서 앞에서 추가한 일정을 뒤에서 고치거나 지울 수도 있다."""
+    payload = request.get_json(silent=True)
+    ops = payload.get("ops") if isinstance(payload, dict) else None
+    if not isinstance(ops, list) or len(ops) > BULK_MAX_OPS:
+        return jsonify({"ok": False, "error": "invalid_input"}), 400
+
+    cs = ChangeSet()
+    results = []
+    for item in ops:
+        op = item.get("op") if isinstance(item, dict) else None
         try:
-            session = Session()
-            eid = event_id
-            if not eid and key is not None and 0 <= index:
-                data = load_data()
-                if key in data and isinstance(data[key], list) and 0 <= index < len(data[key]):
-                    eid = data[key][index].get("event_id")
-            if eid:
-                rows = session.query(CalendarEvent).filter(CalendarEvent.event_id == eid).all()
-                for r in rows:
-                    r.text = new_text(r.text)
-                    r.who = who
-                    r.bg = MEMBERS[who]
-                    r.memo = memo or None
-                session.commit()
-            session.close()
-            return jsonify({"ok": True, "data": load_data()})
-        except Exception as e:
-            if session:
-                session.rollback()
-                session.close()
-            return jsonify({"ok": False, "error": str(e)}), 500
+            if op not in BULK_OPS:
+                raise InvalidInput("op")
+            results.append({"ok": True, "op": op, "event_id": BULK_OPS[op](cs, item)})
+        except InvalidInput as e:
+            results.append({"ok": False, "op": op, "error": "invalid_input", "reason": str(e)})
+
+    if cs.empty():
+        return cs.response(get_version(), results=results)
+    try:
+        version = cs.commit()
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 500
+    return cs.response(version, results=results)
+
+
+def import_json_file(path):
+    """JSON 파일의 일정을 지금 저장소로 한 트랜잭션에 옮기고 건수를 돌려준다.
+    family_events.json(일정 단위)과 예전 family_pro_data.json(슬롯 단위) 모두 읽는다.
+    event_id 기준으로 덮어쓰므로 여러 번 돌려도 중복되지 않는다. 날짜가 잘못된 항목이 있으면 아무것도 옮기지 않고 InvalidInput."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    series = []
+    if isinstance(data.get("events"), dict):
+        events = list(data["events"].values())
+        series = list((data.get("series") or {}).values())
+    else:
+        events = events_from_slots(data)
+    for item in events + series:
+        try:
+            valid_date_str(item.get("date"))
+        except InvalidInput:
+            raise InvalidInput("date: %s %r" % (item.get("event_id") or item.get("series_id"), item.get("date")))
+    if events or series:
+        commit_changes(puts=events, series_puts=series)
+    return len(events) + len(series)
+
+
+@app.cli.command("import-json")
+@click.argument("path", required=False)
+def import_json_command(path):
+    """예: CALENDAR_STORAGE=sqlite flask --app family_app import-json family_pro_data.json"""
+    path = path or (EVENTS_PATH if os.path.exists(EVENTS_PATH) else DATA_PATH)
+    try:
+        n = import_json_file(path)
+    except InvalidInput as e:
+        raise click.ClickException(str(e))
+    click.echo("imported %d events from %s" % (n, path))
+
+
+# ----- iCalendar (.ics) 내보내기/가져오기 -----
+# 내보내기는 ICS_CHUNK_DAYS 일씩 읽어 VEVENT 를 바로 흘려보내고, 가져오기는 줄 단위로 읽어 IMPORT_BATCH 개마다 저장한다.
+# 어느 쪽도 전체를 메모리에 모으지 않는다.
+ICS_CHUNK_DAYS = 31
+IMPORT_BATCH = int(os.environ.get("IMPORT_BATCH", 500))
+_WEEKDAY_NAMES = {v: k for k, v in recurrence.WEEKDAYS.items()}  # 0 → "월"
+
+
+def row_datetime(date_str, row):
+    """날짜 + 칸 번호 → 현지 시각. 마지막 칸 끝(24:00)은 다음 날 00:00."""
+    return datetime.fromisoformat(date_str) + timedelta(minutes=GRID.start + row * GRID.slot_minutes)
+
+
+def event_content(ev):
+    """표시 글 '수현: 영어수업 (09:00~11:00)' → '영어수업'."""
+    text = ev.get("text") or ""
+    prefix = "%s: " % ev.get("who")
+    if text.startswith(prefix):
+        text = text[len(prefix):]
+    return split_time_suffix(text)[0]
+
+
+def ics_uid(event_id):
+    return "%s@%s" % (event_id, calendar_ics.UID_DOMAIN)
+
+
+def ics_event(ev, stamp, series=None):
+    """저장된 일정 하나 → VEVENT. series 가 있으면 그 규칙의 하루를 고친 것이라 규칙의 UID + RECURRENCE-ID 로 쓴다."""
+    uid, recurrence_id = ics_uid(ev["event_id"]), None
+    if series is not None:
+        instance_date = recurrence.split_instance_id(ev["event_id"])[1]
+        uid, recurrence_id = ics_uid(series["series_id"]), row_datetime(instance_date, series["start_row"])
+    return calendar_ics.vevent(uid, row_datetime(ev["date"], ev["start_row"]), row_datetime(ev["date"], ev["end_row"]),
+                               "%s: %s" % (ev["who"], event_content(ev)), ev.get("memo"), ev["who"], stamp,
+                               recurrence_id=recurrence_id)
+
+
+def ics_series_event(sr, stamp, overridden=()):
+    """반복 규칙 하나 → RRULE 이 붙은 VEVENT 하나 (첫날이 규칙에 맞지 않으면 첫 발생일부터). 한 번도 생기지 않으면 None.
+    exceptions 중 overridden(따로 내보낸 고친 날)은 RECURRENCE-ID 가 대신하므로 EXDATE 에서 뺀다."""
+    first = date.fromisoformat(sr["date"])
+    probe_to = first + timedelta(days=min(7 * (sr.get("interval", 1) + 1), (date.max - first).days - 1))
+    first = next(iter(recurrence.occurrences(dict(sr, exceptions=[]), sr["date"], probe_to.isoformat())), None)
+    if first is None:
+        return None
+    rrule = "FREQ=WEEKLY;INTERVAL=%d;BYDAY=%s" % (
+        sr.get("interval", 1), ",".join(calendar_ics.WEEKDAY_CODES[recurrence.WEEKDAYS[x]] for x in sr["days"]))
+    if sr.get("until"):
+        rrule += ";UNTIL=%sT235959" % sr["until"].replace("-", "")
+    exdates = [row_datetime(d, sr["start_row"]) for d in sr.get("exceptions", ()) if d not in overridden and d >= first]
+    return calendar_ics.vevent(ics_uid(sr["series_id"]), row_datetime(first, sr["start_row"]),
+                               row_datetime(first, sr["end_row"]), "%s: %s" % (sr["who"], event_content(sr)),
+                               sr.get("memo"), sr["who"], stamp, rrule=rrule, exdates=exdates)
+
+
+def ics_stream(date_from, date_to):
+    """date_from~date_to 의 일정을 VEVENT 로. 저장된 일정은 하나에 하나, 기간에 걸친 반복 규칙은 RRULE 하나
+    (규칙 전체)이고 그날만 고친 일정은 규칙의 UID + RECURRENCE-ID 로 쓴다. 다시 가져오면 같은 자리에 덮어쓴다."""
+    stamp = datetime.now(timezone.utc)
+    series = {sr["series_id"]: sr for sr in list_series()
+              if sr["date"] <= date_to and (not sr.get("until") or sr["until"] >= date_from)}
+    overridden = {}
+    yield calendar_ics.header(tz_name=CALENDAR_TZ)
+    d, end = date.fromisoformat(date_from), date.fromisoformat(date_to)
+    while True:
+        chunk_end = d + timedelta(days=min(ICS_CHUNK_DAYS - 1, (end - d).days))
+        parts = []
+        for ev in load_events(d.isoformat(), chunk_end.isoformat()):
+            if ev.get("series_id"):
+                continue   # 펼친 하루치는 아래 RRULE 이 나타낸다
+            series_id, instance_date = recurrence.split_instance_id(ev["event_id"])
+            sr = series.get(series_id)
+            if sr is not None:
+                overridden.setdefault(series_id, set()).add(instance_date)
+            parts.append(ics_event(ev, stamp, sr))
+        if parts:
+            yield "".join(parts)
+        if chunk_end == end:
+            break
+        d = chunk_end + timedelta(days=1)
+    for sr in series.values():
+        text = ics_series_event(sr, stamp, overridden.get(sr["series_id"], ()))
+        if text:
+            yield text
+    yield calendar_ics.FOOTER
+
+
+def export_default_range():
+    """기간 없이 내보낼 때: 가장 이른 일정·반복 규칙 첫날(또는 오늘)부터 가장 늦은 것(또는 오늘)까지.
+    반복 규칙은 RRULE 로 통째로 나가므로 펼칠 기간을 더 잡지 않는다."""
+    with _cache_lock:
+        _cache_fresh()
+        days = list(_cache["by_date"]) + [sr["date"] for sr in _cache["series"].values()]
+    today = date.today().isoformat()
+    return min(days + [today]), max(days + [today])
+
+
+@app.route("/api/export.ics", methods=["GET"])
+def api_export_ics():
+    """iCalendar 로 내보내기. from/to 가 없으면 export_default_range(). 휴대폰 달력에서 가져오거나 구독한다.
+    기간은 스트림을 시작하기 전에 검사한다 (RANGE_MAX_DAYS 이하, 9999-12-31 제외). 넘으면 400."""
+    try:
+        date_from, date_to = parse_date_range(request.args, default_week=False)
+        if not date_from:
+            date_from, date_to = export_default_range()
+            if (date.fromisoformat(date_to) - date.fromisoformat(date_from)).days + 1 > RANGE_MAX_DAYS:
+                raise ValueError("range too long")
+        if date.fromisoformat(date_to) == date.max:
+            raise ValueError("date.max")
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_range"}), 400
+    return Response(stream_with_context(ics_stream(date_from, date_to)), mimetype="text/calendar",
+                    headers={"Content-Disposition": 'attachment; filename="family-calendar.ics"'})
+
+
+def ics_event_id(uid):
+    """UID → event_id. 여기서 내보낸 것('<event_id>@family-calendar')이면 원래 id 로 되돌리므로 다시 가져와도 덮어쓴다.
+    다른 달력의 UID 는 해시로 줄인다 (같은 UID 는 항상 같은 id)."""
+    suffix = "@" + calendar_ics.UID_DOMAIN
+    if uid.endswith(suffix) and 0 < len(uid) - len(suffix) <= 64:
+        return uid[:-len(suffix)]
+    return "ics_" + hashlib.sha1(uid.encode("utf-8")).hexdigest()[:24]
+
+
+def apply_ics_event(cs, item, overrides):
+    """VEVENT 하나를 cs 에 담고 "events" / "series" 를 돌려준다. 종일 일정, 시간표(GRID) 밖에 걸친 일정,
+    매주가 아닌 반복은 InvalidInput (가져오기에서 skipped 로 센다).
+    overrides: 이번 가져오기에서 나온 하루치 수정({series_id: {날짜}}) - 규칙을 넣을 때 exceptions 에 더한다
+    (규칙이 하루치보다 뒤에 나오면 EXDATE 에는 그날이 없으므로, 덮어쓸 때 잃지 않게)."""
+    start = item.get("DTSTART")
+    if not isinstance(start, datetime):
+        raise InvalidInput("all_day" if start else "dtstart")
+    end = item.get("DTEND")
+    if not isinstance(end, datetime):
+        duration = calendar_ics.parse_duration(item.get("DURATION"))
+        end = start + duration if duration else start + timedelta(minutes=GRID.slot_minutes)
+    # 칸 끝으로 잘라 넣으면 시각이 바뀐 채 저장되므로, 시간표 밖(예: 02:00, 다음 날까지)에 걸치면 건너뛴다
+    midnight = datetime.combine(start.date(), datetime.min.time())
+    if (start - midnight) < timedelta(minutes=GRID.start) or (end - midnight) > timedelta(minutes=GRID.end):
+        raise InvalidInput("outside_grid")
+    start_row = parse_start_row(start.strftime("%H:%M"))
+    end_row = min(parse_end_row("24:00" if end.date() > start.date() else end.strftime("%H:%M"), start_row), len(TIMES))
+
+    summary = (item.get("SUMMARY") or "").strip()
+    who = next((c.strip() for c in (item.get("CATEGORIES") or "").split(",") if c.strip() in MEMBERS), None)
+    name, sep, rest = summary.partition(": ")
+    if sep and name in MEMBERS:
+        who, summary = who or name, rest
+    who = who or "아빠"
+    content = split_time_suffix(summary)[0] or "(제목 없음)"
+    memo = (item.get("DESCRIPTION") or "").strip()[:512] or None
+    fields = {"start_row": start_row, "end_row": end_row, "who": who,
+              "text": make_display_text(who, content[:400], start_row, end_row), "bg": MEMBERS[who], "memo": memo}
+    uid = item.get("UID") or "%s/%s" % (summary, start.isoformat())
+    eid = ics_event_id(uid)
+
+    if item.get("RRULE") and not item.get("RECURRENCE-ID"):
+        rule = calendar_ics.parse_rrule(item["RRULE"])
+        if rule.get("FREQ") != "WEEKLY" or "COUNT" in rule:
+            raise InvalidInput("rrule")
+        codes = rule.get("BYDAY") or [calendar_ics.WEEKDAY_CODES[start.weekday()]]
+        try:
+            days = [_WEEKDAY_NAMES[calendar_ics.WEEKDAY_CODES.index(code[-2:].upper())] for code in codes]
+            interval = max(1, int(rule.get("INTERVAL", 1)))
+        except ValueError:
+            raise InvalidInput("rrule")
+        until = calendar_ics.parse_value(rule["UNTIL"], tz=CALENDAR_ZONE) if rule.get("UNTIL") else None
+        exceptions = {d.isoformat()[:10] for d in item["EXDATE"]} | overrides.get(eid, set())
+        cs.put_series(dict(fields, series_id=eid, date=start.date().isoformat(),
+                           until=until.isoformat()[:10] if until else None, days=days, interval=interval,
+                           exceptions=sorted(exceptions)))
+        return "series"
+
+    if item.get("RECURRENCE-ID"):
+        eid = recurrence.instance_id(eid, item["RECURRENCE-ID"].isoformat()[:10])
+    series_id, instance_date = recurrence.split_instance_id(eid)
+    if series_id:
+        # 반복 일정의 하루치: 규칙이 있으면 그날을 빼고 보통 일정으로 둔다 (화면에서 그날만 고친 것과 같다)
+        if cs.get_series(series_id) is not None:
+            cs.add_exception(series_id, instance_date)
+        overrides.setdefault(series_id, set()).add(instance_date)
+    cs.put(dict(fields, event_id=eid, date=start.date().isoformat()))
+    return "events"
+
+
+def import_ics(lines, batch=IMPORT_BATCH):
+    """.ics 줄 iterable(파일 객체 그대로) → 지금 저장소로. batch 개마다 한 번씩 저장하고 건수를 돌려준다.
+    UID 기준으로 덮어쓰므로 같은 파일을 여러 번 가져와도 중복되지 않는다."""
+    counts = {"events": 0, "series": 0, "skipped": 0}
+    overrides = {}
+    cs = ChangeSet()
+    pending = 0
+    for item in calendar_ics.read_events(lines, CALENDAR_ZONE):
+        try:
+            counts[apply_ics_event(cs, item, overrides)] += 1
+        except InvalidInput:
+            counts["skipped"] += 1
+            continue
+        pending += 1
+        if pending >= batch:
+            cs.commit()
+            cs = ChangeSet()
+            pending = 0
+    if not cs.empty():
+        cs.commit()
+    return counts
+
+
+@app.route("/api/import.ics", methods=["POST"])
+def api_import_ics():
+    """.ics 가져오기. multipart 의 file 또는 요청 본문 그대로(text/calendar)."""
+    upload = request.files.get("file")
+    try:
+        counts = import_ics(upload.stream if upload else request.stream)
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 500
+    return jsonify(dict(counts, ok=True, version=get_version()))
 
-    data = load_data()
-    def upd(ev, c, w, m):
-        ev["text"] = new_text(ev.get("text", ""))
-        ev["who"] = w
-        ev["bg"] = MEMBERS[w]
-        if "memo" in ev or m:
-            ev["memo"] = m
-    if event_id:
-        for k in list(data.keys()):
-            if not isinstance(data.get(k), list):
-                continue
-            for ev in data[k]:
-                if ev.get("event_id") == event_id:
-                    upd(ev, content, who, memo)
-        with open(DATA_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        return jsonify({"ok": True, "data": load_data()})
-
-    if key and key in data and isinstance(data[key], list) and 0 <= index < len(data[key]):
-        ev = data[key][index]
-        eid = ev.get("event_id")
-        if eid:
-            for k in list(data.keys()):
-                if not isinstance(data.get(k), list):
-                    continue
-                for e in data[k]:
-                    if e.get("event_id") == eid:
-                        upd(e, content, who, memo)
-        else:
-            upd(ev, content, who, memo)
-        with open(DATA_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        return jsonify({"ok": True, "data": load_data()})
 
-    return jsonify({"ok": False, "error": "invalid_input"}), 400
+@app.cli.command("import-ics")
+@click.argument("path")
+def import_ics_command(path):
+    """예: flask --app family_app import-ics family.ics"""
+    with open(path, "rb") as f:
+        counts = import_ics(f)
+    click.echo("imported %(events)d events, %(series)d series (skipped %(skipped)d) from " % counts + path)
 
 
 if __name__ == "__main__":
@@ -383,7 +1894,7 @@ if __name__ == "__main__":
     print("")
     print("=" * 50)
     print("  Family Calendar Web - Server starting")
-    print("  DB:", "PostgreSQL" if DATABASE_URL else "JSON file")
+    print("  DB:", db_engine.dialect.name if db_engine else ("JSON log" if log_store else "JSON file"))
     print("  Open: http://127.0.0.1:%s" % PORT)
     print("=" * 50)
     print("")
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""JSON 파일 저장소 - 프로세스 간 잠금 + 임시 파일 후 rename 으로 원자적 저장.
+
+gunicorn 워커 여러 개가 같은 파일을 고쳐도 쓰기가 서로 덮어쓰지 않고,
+저장 도중 죽어도 파일은 이전 내용이나 새 내용 중 하나로 남는다.
+읽기는 rename 덕분에 항상 완성된 파일만 보므로 잠그지 않는다.
+"""
+import os
+import tempfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import jsoncodec
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class StoreCorruptError(Exception):
+    """저장 파일을 JSON 으로 읽을 수 없음. 빈 데이터로 덮어쓰지 않도록 그대로 올려 보낸다."""
+
+
+@contextmanager
+def file_lock(lock_path):
+    """lock_path 파일에 배타 잠금. 같은 파일을 쓰는 다른 프로세스는 풀릴 때까지 기다린다."""
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK 은 10초 뒤 포기하므로 다시 시도
+        yield
+    finally:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        os.close(fd)
+
+
+def atomic_write_json(path, doc):
+    """같은 폴더의 임시 파일에 공백 없는 JSON 으로 쓰고 fsync 후 os.replace 로 바꿔 끼운다. 쓴 바이트 수를 돌려준다."""
+    dir_name = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=dir_name)
+    try:
+        data = jsoncodec.dumps(doc)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return len(data)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def journal_entry(rec, max_items=500):
+    """변경 한 건({"v", "put", "del", "sput", "sdel"}) → 변경 기록(journal)에 남길 항목.
+    가져오기처럼 너무 큰 변경은 {"v": 버전, "reset": true} 만 남겨, 받는 쪽이 전체를 다시 읽게 한다."""
+    n = sum(len(rec.get(k, ())) for k in ("put", "del", "sput", "sdel"))
+    if n > max_items:
+        return {"v": rec["v"], "reset": True}
+    return rec
+
+
+class JsonFileStore:
+    """JSON 문서 하나를 파일 하나에 저장. 고칠 때는 transaction() 안에서만."""
+
+    def __init__(self, path, empty):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.empty = empty  # 파일이 없을 때 쓸 새 문서를 만드는 함수
+        self.last_write_bytes = 0
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return self.empty()
+        try:
+            with open(self.path, "rb") as f:
+                return jsoncodec.loads(f.read())
+        except ValueError as e:
+            raise StoreCorruptError("%s: %s" % (self.path, e))
+
+    def write(self, doc):
+        with file_lock(self.lock_path):
+            atomic_write_json(self.path, doc)
+
+    def stamp(self):
+        """파일이 바뀌었는지 알아보는 값 (mtime, 크기). 파일이 없으면 None."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    @contextmanager
+    def transaction(self):
+        """잠근 채로 최신 문서를 읽어 넘겨주고, 블록이 예외 없이 끝나면 저장한다.
+        저장 직후의 stamp() 는 self.last_stamp 에, 쓴 바이트 수는 self.last_write_bytes 에 남는다
+        (잠금 안에서 잰 값이라 다른 쓰기가 섞이지 않음)."""
+        with file_lock(self.lock_path):
+            doc = self.read()
+            yield doc
+            self.last_write_bytes = atomic_write_json(self.path, doc)
+            self.last_stamp = self.stamp()
+
+
+class EventLogStore:
+    """스냅샷(JsonFileStore 문서) + 추가 전용 로그 파일.
+
+    쓰기는 로그 끝에 한 줄({"v": 버전, "put": [일정...], "del": [event_id...]}, 반복 규칙은
+    "sput"/"sdel")을 붙이기만 하므로
+    데이터가 많아져도 비용이 일정하다. 줄 수가 compact_every 를 넘으면 스냅샷에 접어 넣고 로그를 비운다.
+    각 프로세스는 스냅샷 + 로그를 메모리에 재생해 두고, 읽기 전에 refresh() 로 다른 프로세스가
+    붙인 줄만 이어서 읽는다. 최근 journal_keep 건의 변경은 self.journal 에 남고, 압축할 때 스냅샷의
+    "journal" 에 함께 저장된다. 한 프로세스의 여러 스레드가 같이 불러도 되도록 메모리 상태는 self._lock 안에서만 고친다.
+    """
+
+    def __init__(self, snapshot, log_path, compact_every=200, journal_keep=1000):
+        self.snapshot = snapshot
+        self.log_path = log_path
+        self.compact_every = compact_every
+        self.version = 0
+        self.events = {}
+        self.series = {}
+        self.journal = deque(maxlen=journal_keep)
+        self.last_write_bytes = 0  # 마지막 append 가 쓴 바이트 (압축했으면 스냅샷 포함)
+        self._offset = 0          # 로그에서 이미 반영한 바이트 수
+        self._pending = 0         # 스냅샷 이후 로그 줄 수
+        self._snapshot_stamp = False  # 아직 한 번도 읽지 않음
+        self._lock = threading.RLock()
+
+    def _log_size(self):
+        try:
+            return os.path.getsize(self.log_path)
+        except OSError:
+            return 0
+
+    def stamp(self):
+        return (self.snapshot.stamp(), self._log_size())
+
+    def _apply(self, rec):
+        # 압축 도중 죽으면 스냅샷에 이미 들어간 줄이 로그에 남으므로 버전으로 거른다
+        if rec["v"] <= self.version:
+            return
+        for eid in rec.get("del", ()):
+            self.events.pop(eid, None)
+        for ev in rec.get("put", ()):
+            self.events[ev["event_id"]] = ev
+        for sid in rec.get("sdel", ()):
+            self.series.pop(sid, None)
+        for sr in rec.get("sput", ()):
+            self.series[sr["series_id"]] = sr
+        self.version = rec["v"]
+        self.journal.append(journal_entry(rec))
+
+    def refresh(self):
+        """스냅샷이 바뀌었으면(다른 프로세스가 압축) 처음부터, 아니면 로그에서 새로 붙은 줄만 읽는다."""
+        with self._lock:
+            while True:
+                snap_stamp = self.snapshot.stamp()
+                self._catch_up(snap_stamp)
+                # 읽는 사이에 압축이 끼었으면 로그 위치가 어긋났을 수 있으니 처음부터 다시
+                if self.snapshot.stamp() == snap_stamp:
+                    return
+                self._snapshot_stamp = False
+
+    def state(self):
+        """refresh 한 뒤 (버전, 일정, 반복 규칙, 변경 기록) 사본. 돌려준 dict/list 는 이후 쓰기와 상관없다."""
+        with self._lock:
+            self.refresh()
+            return self.version, dict(self.events), dict(self.series), list(self.journal)
+
+    def _catch_up(self, snap_stamp):
+        size = self._log_size()
+        if snap_stamp != self._snapshot_stamp or size < self._offset:
+            doc = self.snapshot.read()
+            self.events = dict(doc.get("events", {}))
+            self.series = dict(doc.get("series", {}))
+            self.journal.clear()
+            self.journal.extend(doc.get("journal", ()))
+            self.version = doc.get("version", 0)
+            self._offset = 0
+            self._pending = 0
+            self._snapshot_stamp = snap_stamp
+        if size == self._offset:
+            return
+        with open(self.log_path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+        # 마지막 줄이 아직 덜 쓰였으면(또는 쓰다가 죽었으면) 다음 기회로 미룬다
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                self._apply(jsoncodec.loads(line))
+                self._pending += 1
+        self._offset += end
+
+    def _repair_tail(self):
+        """잠금 안에서: 쓰다 죽은 마지막 줄(개행 없음)을 잘라 낸다."""
+        size = self._log_size()
+        if size > self._offset:
+            with open(self.log_path, "rb") as f:
+                f.seek(self._offset)
+                rest = f.read()
+            cut = self._offset + rest.rfind(b"\n") + 1
+            if cut < size:
+                os.truncate(self.log_path, cut)
+
+    def append(self, puts, deletes, series_puts=(), series_deletes=()):
+        """한 줄을 붙이고 (새 버전, 붙인 직후 stamp) 를 돌려준다. 필요하면 바로 압축한다."""
+        with self._lock, file_lock(self.snapshot.lock_path):
+            self.refresh()
+            self._repair_tail()
+            rec = {"v": self.version + 1, "put": list(puts), "del": list(deletes)}
+            if series_puts or series_deletes:
+                rec.update(sput=list(series_puts), sdel=list(series_deletes))
+            line = jsoncodec.dumps(rec) + b"\n"
+            fd = os.open(self.log_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._apply(rec)
+            self.last_write_bytes = len(line)
+            self._offset += len(line)
+            self._pending += 1
+            if self._pending >= self.compact_every:
+                self._compact_locked()
+            return self.version, self.stamp()
+
+    def _compact_locked(self):
+        doc = self.snapshot.read()
+        doc["version"] = self.version
+        doc["events"] = self.events
+        doc["series"] = self.series
+        doc["journal"] = list(self.journal)
+        self.last_write_bytes += atomic_write_json(self.snapshot.path, doc)
+        # 스냅샷을 먼저 바꾼 뒤 로그를 비운다. 그 사이에 죽어도 _apply 가 이미 반영된 줄을 건너뛴다.
+        if os.path.exists(self.log_path):
+            os.truncate(self.log_path, 0)
+        self._offset = 0
+        self._pending = 0
+        self._snapshot_stamp = self.snapshot.stamp()
+
+    def compact(self):
+        """로그를 스냅샷에 접어 넣는다. 로그가 없거나 비어 있으면 아무것도 하지 않는다."""
+        if not self._log_size():
+            return
+        with self._lock, file_lock(self.snapshot.lock_path):
+            self.refresh()
+            self._compact_locked()
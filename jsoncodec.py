@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""JSON 직렬화 - orjson 이나 msgspec 이 깔려 있으면 그쪽을, 없으면 표준 json 을 쓴다.
+
+어느 쪽이든 결과는 공백 없는 UTF-8 바이트(한글은 그대로)이고, 읽다 실패하면 ValueError 다.
+JSON_CODEC=json|orjson|msgspec 으로 고를 수 있다(기본은 있는 것 중 빠른 것).
+"""
+import os
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+_wanted = os.environ.get("JSON_CODEC", "auto")
+if _wanted in ("auto", "orjson") and orjson is not None:
+    NAME = "orjson"
+elif _wanted in ("auto", "msgspec") and msgspec is not None:
+    NAME = "msgspec"
+else:
+    NAME = "json"
+
+
+def dumps(obj, default=None):
+    """obj → JSON 바이트. default 는 모르는 타입을 바꿔 줄 함수(json.dumps 의 default 와 같음)."""
+    if NAME == "orjson":
+        return orjson.dumps(obj, default=default)
+    if NAME == "msgspec":
+        return msgspec.json.encode(obj, enc_hook=default)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default).encode("utf-8")
+
+
+def loads(data):
+    """JSON 바이트/문자열 → 객체. 잘못된 JSON 이면 ValueError."""
+    if NAME == "orjson":
+        return orjson.loads(data)
+    if NAME == "msgspec":
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e))
+    return json.loads(data)
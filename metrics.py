@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""가벼운 계측 - 카운터/히스토그램을 메모리에 모아 Prometheus 텍스트 형식으로 내보낸다.
+
+값은 프로세스(gunicorn 워커)마다 따로 쌓인다. 모든 메서드는 스레드 안전하다.
+"""
+import threading
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+
+
+def _label_str(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join('%s="%s"' % (k, esc(v)) for k, v in pairs) + "}"
+
+
+def _num(v):
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    """계속 늘어나기만 하는 값. inc(amount, 라벨=값...)."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(k, "") for k in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return ["%s%s %s" % (self.name, _label_str(self.labels, key), _num(v)) for key, v in items]
+
+
+class Histogram:
+    """관측값 분포. observe(초, 라벨=값...). 버킷은 누적(le) 형식으로 내보낸다."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # 라벨 → [버킷별 개수..., 합, 개수]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(k, "") for k in self.labels)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    s[i] += 1
+                    break
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for key, s in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, s):
+                cumulative += n
+                lines.append("%s_bucket%s %d" % (self.name, _label_str(self.labels, key, [("le", repr(bound))]), cumulative))
+            lines.append("%s_bucket%s %d" % (self.name, _label_str(self.labels, key, [("le", "+Inf")]), s[-1]))
+            lines.append("%s_sum%s %s" % (self.name, _label_str(self.labels, key), repr(s[-2])))
+            lines.append("%s_count%s %d" % (self.name, _label_str(self.labels, key), s[-1]))
+        return lines
+
+
+class Gauge:
+    """내보낼 때 fn() 을 불러 값을 읽는다. fn 은 숫자 하나 또는 {라벨값 튜플: 숫자}."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, fn, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.fn = fn
+        REGISTRY.append(self)
+
+    def render(self):
+        value = self.fn()
+        items = sorted(value.items()) if isinstance(value, dict) else [((), value)]
+        return ["%s%s %s" % (self.name, _label_str(self.labels, key), _num(v)) for key, v in items]
+
+
+def render():
+    """등록된 모든 값 → Prometheus 텍스트 형식 (text/plain; version=0.0.4)."""
+    lines = []
+    for m in REGISTRY:
+        lines.append("# HELP %s %s" % (m.name, m.help))
+        lines.append("# TYPE %s %s" % (m.name, m.kind))
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
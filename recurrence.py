@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""반복 일정 - 규칙은 한 번만 저장하고, 요청한 기간에 대해서만 하루하루의 일정으로 펼친다.
+
+반복 규칙(series) dict:
+    series_id, date(첫날), until(마지막 날, 없으면 None), days(["월", "수"]), interval(몇 주마다),
+    exceptions(빠진 날짜 목록), start_row, end_row, who, text, bg, memo
+펼친 일정의 event_id 는 "<series_id>@<YYYY-MM-DD>" 이다. 그날 것만 고치면 같은 id 로 보통 일정이 저장되고
+그 날짜는 exceptions 에 들어가 규칙에서 빠진다.
+"""
+from datetime import date, timedelta
+
+WEEKDAYS = {"월": 0, "화": 1, "수": 2, "목": 3, "금": 4, "토": 5, "일": 6}
+INSTANCE_SEP = "@"
+SERIES_FIELDS = ("start_row", "end_row", "who", "text", "bg", "memo")
+
+
+def instance_id(series_id, date_str):
+    return f"{series_id}{INSTANCE_SEP}{date_str}"
+
+
+def split_instance_id(event_id):
+    """"s123@2026-03-02" → ("s123", "2026-03-02"). 반복 일정 id 가 아니면 (None, None)."""
+    series_id, sep, date_str = (event_id or "").rpartition(INSTANCE_SEP)
+    if not sep or not series_id or len(date_str) != 10:
+        return None, None
+    return series_id, date_str
+
+
+def parse_repeat(repeat, start_date):
+    """요청의 repeat({"days": ["월", "수"], "interval": 1, "until": "YYYY-MM-DD"}) → (days, interval, until).
+    days 가 비어 있으면 첫날의 요일 하나. 값이 잘못되면 ValueError."""
+    if not isinstance(repeat, dict):
+        raise ValueError("repeat")
+    start = date.fromisoformat(start_date)
+    days = repeat.get("days") or [day_name(start)]
+    if not isinstance(days, list) or any(d not in WEEKDAYS for d in days):
+        raise ValueError("days")
+    days = sorted(set(days), key=WEEKDAYS.get)
+    interval = int(repeat.get("interval") or 1)
+    if not 1 <= interval <= 52:
+        raise ValueError("interval")
+    until = repeat.get("until") or None
+    if until is not None and date.fromisoformat(until) < start:
+        raise ValueError("until")
+    return days, interval, until
+
+
+def day_name(d):
+    return next(k for k, v in WEEKDAYS.items() if v == d.weekday())
+
+
+def occurs_on(series, date_str):
+    """series 가 date_str 에 일정을 만드는지 (exceptions 포함해서 판단)."""
+    if date_str < series["date"] or (series.get("until") and date_str > series["until"]):
+        return False
+    if date_str in series.get("exceptions", ()):
+        return False
+    d = date.fromisoformat(date_str)
+    if d.weekday() not in {WEEKDAYS[x] for x in series["days"]}:
+        return False
+    return _week_no(series, d) % series.get("interval", 1) == 0
+
+
+def _week_no(series, d):
+    # 첫날이 들어 있는 주(월요일 시작)를 0주로 센다
+    start = date.fromisoformat(series["date"])
+    return ((d - timedelta(days=d.weekday())) - (start - timedelta(days=start.weekday()))).days // 7
+
+
+def occurrences(series, date_from=None, date_to=None):
+    """date_from~date_to(양 끝 포함) 안의 발생 날짜 문자열. 주 단위로 건너뛰므로 기간 길이에만 비례한다.
+    끝이 정해지지 않은(until 도 date_to 도 없는) 규칙은 펼치지 않는다."""
+    lo = max(date_from or series["date"], series["date"])
+    hi = min(x for x in (date_to, series.get("until")) if x) if (date_to or series.get("until")) else None
+    if hi is None or lo > hi:
+        return
+    lo_d, hi_d = date.fromisoformat(lo), date.fromisoformat(hi)
+    interval = series.get("interval", 1)
+    weekdays = sorted(WEEKDAYS[x] for x in series["days"])
+    exceptions = set(series.get("exceptions", ()))
+    week = lo_d - timedelta(days=lo_d.weekday())
+    skip = (-_week_no(series, week)) % interval
+    week += timedelta(weeks=skip)
+    while week <= hi_d:
+        for wd in weekdays:
+            d = week + timedelta(days=wd)
+            if lo_d <= d <= hi_d:
+                s = d.isoformat()
+                if s not in exceptions:
+                    yield s
+        week += timedelta(weeks=interval)
+
+
+def make_instance(series, date_str):
+    ev = {k: series.get(k) for k in SERIES_FIELDS}
+    ev.update(event_id=instance_id(series["series_id"], date_str), date=date_str, series_id=series["series_id"])
+    return ev
+
+
+def expand(series_list, date_from=None, date_to=None):
+    """반복 규칙들 → 기간 안의 일정 dict 목록."""
+    return [make_instance(s, d) for s in series_list for d in occurrences(s, date_from, date_to)]
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""일정 검색용 메모리 역색인 - 글자 1-gram/2-gram 으로 색인해 한국어처럼 띄어쓰기가 제각각인 글도 찾는다.
+
+"영어수업" 은 "영어", "어수", "수업" 이 모두 든 문서만 후보로 고른 뒤 실제로 그 글이 들어 있는지 다시 본다.
+그래서 "수업" 으로도, "영어수업" 으로도, 띄어 쓴 "영어 수업" 으로도(낱말마다) 찾는다.
+문서 하나는 id 하나(일정은 event_id)라 같은 일정이 결과에 두 번 나오지 않는다. 스레드 안전하지 않으므로 부르는 쪽이 잠근다.
+"""
+import re
+import unicodedata
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize(text):
+    """비교용: 호환 문자 정리(NFKC, 맥의 자모 분리 한글 포함) + 대소문자 무시."""
+    return unicodedata.normalize("NFKC", text or "").casefold()
+
+
+def grams(word):
+    """낱말 하나 → 색인 단위. 한 글자면 그 글자, 아니면 이웃한 두 글자씩."""
+    if len(word) == 1:
+        return {word}
+    return {word[i:i + 2] for i in range(len(word) - 1)}
+
+
+def query_words(query):
+    return _WORD_RE.findall(normalize(query))
+
+
+class SearchIndex:
+    """id → (색인한 글, 원래 dict). put/remove 는 바뀐 문서의 글자 조각만 고친다.
+    text 를 주면 문서 dict → 색인할 글 을 그 함수로 얻는다(없으면 fields 값을 이어 붙인다)."""
+
+    def __init__(self, fields=("text", "memo"), text=None):
+        self.fields = fields
+        self.text = text or (lambda doc: " ".join(doc.get(f) or "" for f in self.fields))
+        self._docs = {}
+        self._postings = {}   # 글자 조각 또는 ("who", 이름) → id 집합
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _terms(self, text, who):
+        terms = {("who", who)}
+        for word in _WORD_RE.findall(text):
+            terms.update(grams(word))
+            if len(word) > 1:
+                terms.update(word)   # 한 글자 검색용
+        return terms
+
+    def put(self, doc_id, doc):
+        self.remove(doc_id)
+        text = normalize(self.text(doc))
+        terms = self._terms(text, doc.get("who"))
+        self._docs[doc_id] = (text, terms, doc)
+        for t in terms:
+            self._postings.setdefault(t, set()).add(doc_id)
+
+    def remove(self, doc_id):
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return
+        for t in entry[1]:
+            ids = self._postings.get(t)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self._postings[t]
+
+    def search(self, query="", who=None):
+        """query 의 낱말이 모두 들어 있고(순서 무관) who 가 맞는 문서 dict 들. 둘 다 없으면 전부."""
+        words = query_words(query)
+        terms = [("who", who)] if who else []
+        for w in words:
+            terms.extend(grams(w))
+        if not terms:
+            return [doc for _, _, doc in self._docs.values()]
+        # 가장 짧은 목록부터 교집합
+        lists = sorted((self._postings.get(t, ()) for t in terms), key=len)
+        ids = set(lists[0])
+        for other in lists[1:]:
+            if not ids:
+                break
+            ids &= other
+        # 두 글자 이하 낱말은 색인 조각 자체라 다시 볼 필요가 없다
+        check = [w for w in words if len(w) > 2]
+        docs = self._docs
+        if not check:
+            return [docs[doc_id][2] for doc_id in ids]
+        return [docs[doc_id][2] for doc_id in ids if all(w in docs[doc_id][0] for w in check)]
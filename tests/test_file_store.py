@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""file_store 의 로그 재생/압축과 스레드 잠금.  python -m pytest tests"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from file_store import EventLogStore, JsonFileStore  # noqa: E402
+
+
+def empty_doc():
+    return {"format": 2, "version": 0, "events": {}, "series": {}, "journal": []}
+
+
+def event(i):
+    return {"event_id": "e%d" % i, "date": "2026-03-02", "start_row": 0, "end_row": 1,
+            "who": "아빠", "text": "x%d" % i, "bg": "#fff", "memo": None}
+
+
+class EventLogStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.snapshot_path = os.path.join(self.dir.name, "events.json")
+        self.log_path = os.path.join(self.dir.name, "events.log")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def open_store(self, compact_every=200):
+        return EventLogStore(JsonFileStore(self.snapshot_path, empty_doc), self.log_path, compact_every)
+
+    def test_replay_and_compaction_seen_by_other_process(self):
+        writer, reader = self.open_store(compact_every=5), self.open_store(compact_every=5)
+        for i in range(12):
+            writer.append([event(i)], [])
+        writer.append([], ["e0"])
+        version, events, _, journal = reader.state()
+        self.assertEqual(version, 13)
+        self.assertEqual(set(events), {"e%d" % i for i in range(1, 12)})
+        self.assertEqual([rec["v"] for rec in journal], list(range(1, 14)))
+
+    def test_state_is_a_copy(self):
+        store = self.open_store()
+        store.append([event(1)], [])
+        _, events, _, journal = store.state()
+        store.append([event(2)], [])
+        self.assertEqual(set(events), {"e1"})
+        self.assertEqual(len(journal), 1)
+
+    def test_concurrent_readers_and_writers(self):
+        # 같은 프로세스의 스레드들이 같은 store 를 읽는 동안 다른 스레드(와 다른 "프로세스")가 쓴다
+        store, other = self.open_store(compact_every=50), self.open_store(compact_every=50)
+        errors = []
+        done = threading.Event()
+
+        def read():
+            try:
+                while not done.is_set():
+                    version, events, _, journal = store.state()
+                    if journal and journal[-1]["v"] != version:
+                        raise AssertionError("journal behind version")
+                    time.sleep(0.001)   # 요청 처리 사이의 틈. 없으면 잠금을 놓자마자 다시 잡아 쓰는 쪽이 굶는다
+            except Exception as e:  # noqa: BLE001
+                errors.append(e)
+
+        def write(s, start):
+            try:
+                for i in range(start, start + 200):
+                    s.append([event(i)], [])
+            except Exception as e:  # noqa: BLE001
+                errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(6)]
+        writers = [threading.Thread(target=write, args=(store, 0)), threading.Thread(target=write, args=(other, 1000))]
+        for t in readers + writers:
+            t.start()
+        for t in writers:
+            t.join()
+        done.set()
+        for t in readers:
+            t.join()
+        self.assertEqual(errors, [])
+        version, events, _, _ = self.open_store().state()
+        self.assertEqual(version, 400)
+        self.assertEqual(len(events), 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""하루 시간표 칸(슬롯) 계산 - 칸 번호 ↔ "HH:MM" 를 dict 로 미리 만들어 두고 한 번에 찾는다.
+
+칸 번호(row)는 times 의 인덱스다. 일정은 range(start_row, end_row) 칸을 차지하고(end_row 미포함),
+표시용 종료 시각은 times[end_row] 이다. 그래서 times 는 시작 시각부터 끝 시각까지 양 끝을 포함한다.
+"""
+import re
+
+# "9", "09", "9:15", "09:30", "0930", "930", "21시", "9시 30분", "9시반"
+_TIME_RE = re.compile(r"^(\d{1,2})(?::(\d{2})|(\d{2})|\s*시\s*(?:(\d{1,2})\s*분|(반))?)?$")
+
+
+def parse_minutes(value):
+    """시각 문자열/숫자 → 자정부터의 분. 알아볼 수 없거나 0~24시 밖이면 None."""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        hour, minute = value, 0
+    else:
+        m = _TIME_RE.match(str(value).strip())
+        if not m:
+            return None
+        hour = int(m.group(1))
+        minute = int(m.group(2) or m.group(3) or m.group(4) or 0) + (30 if m.group(5) else 0)
+    if not (0 <= hour <= 24 and 0 <= minute < 60) or (hour == 24 and minute):
+        return None
+    return hour * 60 + minute
+
+
+class TimeGrid:
+    """start_hour:00 부터 end_hour:00 까지 slot_minutes 간격의 시간표."""
+
+    def __init__(self, slot_minutes=30, start_hour=6, end_hour=24):
+        if not (0 < slot_minutes <= 60 and 60 % slot_minutes == 0 and 0 <= start_hour < end_hour <= 24):
+            raise ValueError("bad time grid: %s min, %s~%s" % (slot_minutes, start_hour, end_hour))
+        self.slot_minutes = slot_minutes
+        self.start = start_hour * 60
+        self.end = end_hour * 60
+        self.times = ["%02d:%02d" % divmod(m, 60) for m in range(self.start, self.end + 1, slot_minutes)]
+        self.index = {t: i for i, t in enumerate(self.times)}
+        self.last = len(self.times) - 1
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.times)
+
+    def _minutes(self, value):
+        # 같은 입력(대부분 "HH:MM")은 정규식을 다시 돌리지 않는다
+        key = value if isinstance(value, int) else str(value).strip()
+        if key in self.index:
+            return self.start + self.index[key] * self.slot_minutes
+        minutes = self._cache.get(key, False)
+        if minutes is False:
+            if len(self._cache) > 1024:
+                self._cache.clear()
+            minutes = self._cache[key] = parse_minutes(key)
+        return minutes
+
+    def row_at(self, minutes, round_up=False):
+        """분 → 칸 번호. 칸 경계가 아니면 내림(round_up 이면 올림), 시간표 밖이면 양 끝으로."""
+        offset = minutes - self.start
+        row = -(-offset // self.slot_minutes) if round_up else offset // self.slot_minutes
+        return max(0, min(row, self.last))
+
+    def start_row(self, value, default=0):
+        """시작 시각 → 칸 번호. 비었거나 알아볼 수 없으면 default."""
+        row = self.index.get(value) if isinstance(value, str) else None
+        if row is not None:
+            return row
+        if value is None or not str(value).strip():
+            return default
+        minutes = self._minutes(value)
+        return default if minutes is None else self.row_at(minutes)
+
+    def end_row(self, value, start_row):
+        """종료 시각 → end_row(미포함). 비었거나, 알아볼 수 없거나, 시작보다 빠르면 start_row + 1."""
+        row = self.index.get(value) if isinstance(value, str) else None
+        if row is not None:
+            return row if row > start_row else start_row + 1
+        if value is None or not str(value).strip():
+            return start_row + 1
+        minutes = self._minutes(value)
+        if minutes is None:
+            return start_row + 1
+        row = self.row_at(minutes, round_up=True)
+        return row if row > start_row else start_row + 1
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""주간 화면 배치 - 하루의 일정을 겹치는 묶음(block)으로 나누고 묶음 안에서 칸(lane)을 정한다.
+
+시작 칸 순으로 한 번 훑으면서(sweep line) 진행 중인 일정을 끝 칸 기준 힙에, 비어 있는 lane 을 번호 힙에 두므로
+일정 n 개에 O(n log n). 같은 시각에 시작하면 저장된 순서(먼저 만든 것이 왼쪽)를 따른다.
+"""
+import heapq
+
+
+def day_blocks(events):
+    """하루 일정 목록 → [{"start_row", "end_row", "lanes", "events": [일정 + "lane"]}] (시작 칸 순).
+    묶음은 시간이 이어서 겹치는 일정끼리이고, lanes 는 그 묶음에 필요한 열 수다."""
+    blocks = []
+    block = None
+    active = []   # (end_row, lane) 진행 중
+    free = []     # 지금 묶음에서 비어 있는 lane
+    for ev in sorted(events, key=lambda e: e["start_row"]):
+        start = ev["start_row"]
+        end = max(ev["end_row"], start + 1)
+        while active and active[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(active)[1])
+        if not active:
+            block = {"start_row": start, "end_row": end, "lanes": 0, "events": []}
+            blocks.append(block)
+            free = []
+        lane = heapq.heappop(free) if free else block["lanes"]
+        block["lanes"] = max(block["lanes"], lane + 1)
+        block["end_row"] = max(block["end_row"], end)
+        heapq.heappush(active, (end, lane))
+        block["events"].append(dict(ev, lane=lane))
+    return blocks
+
+
+def week_layout(events, dates):
+    """일정 목록 → {날짜: day_blocks(...)}. dates 에 없는 날짜의 일정은 뺀다."""
+    by_date = {d: [] for d in dates}
+    for ev in events:
+        if ev["date"] in by_date:
+            by_date[ev["date"]].append(ev)
+    return {d: day_blocks(evs) for d, evs in by_date.items()}